@@ -2,10 +2,13 @@ import uuid
 from datetime import datetime
 
 class BaseModel:
+    # Models keep their attributes in slots instead of a per-instance
+    # __dict__; subclasses list theirs, name-mangled ones included
+    __slots__ = ('id', 'created_at', 'updated_at')
+
     def __init__(self):
         self.id = str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.created_at = self.updated_at = datetime.now()
 
     def save(self):
         """Update the updated_at timestamp whenever the object is modified"""
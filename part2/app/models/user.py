@@ -2,6 +2,7 @@ from .basemodel import BaseModel
 import re
 
 class User(BaseModel):
+    __slots__ = ('__first_name', '__last_name', '__email', '__is_admin', 'places', 'reviews')
     emails = set()
 
     def __init__(self, first_name, last_name, email, is_admin=False):
@@ -0,0 +1,101 @@
+"""
+Measure the memory held by in-memory model instances, before and after __slots__
+
+Builds N places (plus N reviews and N amenities) sharing one owner and
+reports the bytes allocated per object with tracemalloc, ids and
+timestamps included. The same objects are built with the models of
+--baseline, a git revision (by default the one before the models got
+__slots__), and with the current ones.
+
+    python benchmarks/memory_benchmark.py [--count 1000000] [--baseline REV]
+"""
+import argparse
+import gc
+import importlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+MODELS = ('basemodel', 'user', 'place', 'review', 'amenity')
+
+
+def git(*args):
+    return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+
+def default_baseline():
+    """Parent of the commit that added __slots__ to BaseModel"""
+    commits = git('log', '--format=%H', '--reverse', '-S__slots__', '--', 'app/models/basemodel.py').split()
+    if not commits:
+        raise SystemExit("No commit adds __slots__ to app/models/basemodel.py, pass --baseline")
+    return commits[0] + '^'
+
+
+def load_models(revision, directory):
+    """Import the models of a git revision as the baseline_models package"""
+    package = os.path.join(directory, 'baseline_models')
+    os.makedirs(package)
+    open(os.path.join(package, '__init__.py'), 'w').close()
+    for name in MODELS:
+        with open(os.path.join(package, f'{name}.py'), 'w') as f:
+            f.write(git('show', f'{revision}:./app/models/{name}.py'))
+    sys.path.insert(0, directory)
+    return {name: importlib.import_module(f'baseline_models.{name}') for name in MODELS}
+
+
+def current_models():
+    return {name: importlib.import_module(f'app.models.{name}') for name in MODELS}
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(count)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / count, elapsed
+
+
+def builds(models):
+    User = models['user'].User
+    Place = models['place'].Place
+    Review = models['review'].Review
+    Amenity = models['amenity'].Amenity
+    owner = User(first_name="Bench", last_name="Mark", email=f"bench.mark.{id(models)}@example.com")
+    place = Place(title="Bench place", price=10, latitude=1.0, longitude=2.0, owner=owner)
+    return {
+        'Place': lambda n: [Place(title=f"Place {i}", price=100, latitude=48.85, longitude=2.35,
+                                  owner=owner, description="A nice place to stay") for i in range(n)],
+        'Review': lambda n: [Review(text="Great stay!", rating=5, place=place, user=owner) for _ in range(n)],
+        'Amenity': lambda n: [Amenity(name="WiFi") for _ in range(n)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--baseline', help='git revision to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        layouts = {'before': builds(load_models(args.baseline or default_baseline(), directory)),
+                   'after': builds(current_models())}
+        print(f"{'':8} {'before':>14} {'after':>14}   ({args.count} objects each)")
+        for name in layouts['after']:
+            before, _ = measure(layouts['before'][name], args.count)
+            after, elapsed = measure(layouts['after'][name], args.count)
+            print(f"{name:8} {before:8.1f} B/obj {after:8.1f} B/obj   "
+                  f"{(after - before) / before:+.0%}, built in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -116,5 +116,5 @@ class PlaceReviewList(Resource):
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
-        return [review.to_dict() for review in place.reviews], 200
+        return [review.to_dict() for review in facade.get_reviews_by_place(place_id)], 200
     
@@ -1,6 +1,8 @@
 from .basemodel import BaseModel
 
 class Amenity(BaseModel):
+	__slots__ = ('__name',)
+
 	def __init__(self, name):
 		super().__init__()	
 		self.name = name
@@ -2,6 +2,9 @@ from .basemodel import BaseModel
 from .user import User
 
 class Place(BaseModel):
+    __slots__ = ('__title', 'description', '__price', '__latitude', '__longitude', '__owner',
+                 'reviews', 'amenities')
+
     def __init__(self, title, price, latitude, longitude, owner, description=None):
         super().__init__()
         self.title = title
@@ -3,6 +3,8 @@ from .place import Place
 from .user import User
 
 class Review(BaseModel):
+	__slots__ = ('__text', '__rating', '__place', '__user')
+
 	def __init__(self, text, rating, place, user):
 		super().__init__()
 		self.text = text
@@ -3,6 +3,7 @@ import re
 from app.extensions import bcrypt
 
 class User(BaseModel):
+    __slots__ = ('__first_name', '__last_name', '__email', '__is_admin', 'places', 'reviews', 'password')
     emails = set()
 
     def __init__(self, first_name, last_name, email, password, is_admin=False):
@@ -29,9 +29,29 @@ class Repository(ABC):
 class InMemoryRepository(Repository):
     def __init__(self):
         self._storage = {}
+        self._indexes = {}
+
+    def add_index(self, attr_name, unique=False, key=None):
+        """
+        Declare a secondary index so get_by_attribute(attr_name, ...) is O(1)
+
+        `key` computes the indexed value from an object and defaults to
+        reading the attribute itself, which lets relations be indexed by id
+        (e.g. key=lambda place: place.owner.id). Unique indexes reject a
+        second object with the same value.
+        """
+        index = _Index(key or (lambda obj: getattr(obj, attr_name)), unique)
+        for obj in self._storage.values():
+            index.check(obj)
+            index.insert(obj)
+        self._indexes[attr_name] = index
 
     def add(self, obj):
+        for index in self._indexes.values():
+            index.check(obj)
         self._storage[obj.id] = obj
+        for index in self._indexes.values():
+            index.insert(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -42,11 +62,74 @@ class InMemoryRepository(Repository):
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            obj.update(data)
+            previous = {key: getattr(obj, key) for key in data if hasattr(obj, key)}
+            previous['updated_at'] = obj.updated_at
+            try:
+                obj.update(data)
+                # Unique indexes are checked before any entry moves
+                for index in self._indexes.values():
+                    index.check(obj)
+            except (TypeError, ValueError):
+                # Put the old values back so the object still matches its entries
+                for key, value in previous.items():
+                    if getattr(obj, key) != value:
+                        setattr(obj, key, value)
+                raise
+            for index in self._indexes.values():
+                index.remove(obj)
+                index.insert(obj)
 
     def delete(self, obj_id):
         if obj_id in self._storage:
-            del self._storage[obj_id]
+            obj = self._storage.pop(obj_id)
+            for index in self._indexes.values():
+                index.remove(obj)
 
     def get_by_attribute(self, attr_name, attr_value):
+        if attr_name == 'id':
+            return self.get(attr_value)
+        if attr_name in self._indexes:
+            return next(iter(self.get_all_by_attribute(attr_name, attr_value)), None)
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        index = self._indexes.get(attr_name)
+        if index is None:
+            return [obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value]
+        return [self._storage[obj_id] for obj_id in index.lookup(attr_value)]
+
+
+class _Index:
+    """Hash index mapping an indexed value to the ids of the objects holding it"""
+
+    def __init__(self, key, unique):
+        self.key = key
+        self.unique = unique
+        self._ids = {}
+        # Value each object was indexed under, so removal still works after
+        # the object has been mutated
+        self._values = {}
+
+    def check(self, obj):
+        if self.unique:
+            holders = self._ids.get(self.key(obj), ())
+            if any(obj_id != obj.id for obj_id in holders):
+                raise ValueError(f"Duplicate value for unique index: {self.key(obj)}")
+
+    def insert(self, obj):
+        """Add obj under its current value, callers check() unique indexes first"""
+        value = self.key(obj)
+        self._ids.setdefault(value, {})[obj.id] = None
+        self._values[obj.id] = value
+
+    def remove(self, obj):
+        if obj.id not in self._values:
+            return
+        value = self._values.pop(obj.id)
+        holders = self._ids[value]
+        del holders[obj.id]
+        if not holders:
+            del self._ids[value]
+
+    def lookup(self, value):
+        return list(self._ids.get(value, ()))
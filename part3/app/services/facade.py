@@ -11,6 +11,11 @@ class HBnBFacade:
         self.place_repo = InMemoryRepository()
         self.review_repo = InMemoryRepository()
 
+        # Secondary indexes for the lookups done on every login/creation
+        self.user_repo.add_index('email', unique=True)
+        self.amenity_repo.add_index('name')
+        self.review_repo.add_index('place_id', key=lambda review: review.place.id)
+
     # USER
     def create_user(self, user_data):
         user = User(**user_data)
@@ -104,7 +109,7 @@ class HBnBFacade:
         place = self.place_repo.get(place_id)
         if not place:
             raise KeyError('Place not found')
-        return place.reviews
+        return self.review_repo.get_all_by_attribute('place_id', place_id)
 
     def update_review(self, review_id, review_data):
         self.review_repo.update(review_id, review_data)
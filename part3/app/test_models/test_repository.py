@@ -0,0 +1,80 @@
+import unittest
+from app.persistence.repository import InMemoryRepository
+from app.models.amenity import Amenity
+from app.models.user import User
+from app.models.place import Place
+from app.services.facade import HBnBFacade
+
+class TestInMemoryRepositoryIndexes(unittest.TestCase):
+    def test_unique_index_lookup(self):
+        repo = InMemoryRepository()
+        repo.add_index('email', unique=True)
+        user = User(first_name="John", last_name="Doe", email="index.john@example.com", password="secret")
+        repo.add(user)
+        self.assertIs(repo.get_by_attribute('email', "index.john@example.com"), user)
+        self.assertIsNone(repo.get_by_attribute('email', "nobody@example.com"))
+
+    def test_index_follows_update_and_delete(self):
+        repo = InMemoryRepository()
+        repo.add_index('name')
+        amenity = Amenity(name="WiFi")
+        repo.add(amenity)
+        repo.update(amenity.id, {'name': "Parking"})
+        self.assertIsNone(repo.get_by_attribute('name', "WiFi"))
+        self.assertIs(repo.get_by_attribute('name', "Parking"), amenity)
+        repo.delete(amenity.id)
+        self.assertIsNone(repo.get_by_attribute('name', "Parking"))
+
+    def test_non_unique_index_with_key(self):
+        repo = InMemoryRepository()
+        repo.add_index('owner_id', key=lambda place: place.owner.id)
+        owner = User(first_name="Jane", last_name="Doe", email="index.jane@example.com", password="secret")
+        places = [Place(title=f"Place {i}", price=10, latitude=1.0, longitude=2.0, owner=owner) for i in range(3)]
+        for place in places:
+            repo.add(place)
+        self.assertEqual(repo.get_all_by_attribute('owner_id', owner.id), places)
+
+    def test_unique_index_rejects_duplicates(self):
+        repo = InMemoryRepository()
+        repo.add_index('name', unique=True)
+        repo.add(Amenity(name="Pool"))
+        with self.assertRaises(ValueError):
+            repo.add(Amenity(name="Pool"))
+
+    def test_failed_unique_update_keeps_object_indexed(self):
+        repo = InMemoryRepository()
+        repo.add_index('name', unique=True)
+        pool = Amenity(name="Pool")
+        sauna = Amenity(name="Sauna")
+        repo.add(pool)
+        repo.add(sauna)
+        with self.assertRaises(ValueError):
+            repo.update(sauna.id, {'name': "Pool"})
+        self.assertEqual(sauna.name, "Sauna")
+        self.assertIs(repo.get_by_attribute('name', "Sauna"), sauna)
+        self.assertIs(repo.get_by_attribute('name', "Pool"), pool)
+
+    def test_add_index_rejects_existing_duplicates(self):
+        repo = InMemoryRepository()
+        repo.add(Amenity(name="Pool"))
+        repo.add(Amenity(name="Pool"))
+        with self.assertRaises(ValueError):
+            repo.add_index('name', unique=True)
+
+    def test_reviews_by_place_use_the_place_index(self):
+        facade = HBnBFacade()
+        owner = facade.create_user({"first_name": "Ann", "last_name": "Doe", "email": "index.ann@example.com", "password": "secret"})
+        guest = facade.create_user({"first_name": "Bob", "last_name": "Doe", "email": "index.bob@example.com", "password": "secret"})
+        place = facade.create_place({"title": "Loft", "price": 10, "latitude": 1.0, "longitude": 2.0,
+                                      "owner_id": owner.id})
+        other = facade.create_place({"title": "Barn", "price": 10, "latitude": 1.0, "longitude": 2.0,
+                                      "owner_id": owner.id})
+        review = facade.create_review({"text": "Great", "rating": 5, "user_id": guest.id, "place_id": place.id})
+        facade.create_review({"text": "Fine", "rating": 3, "user_id": guest.id, "place_id": other.id})
+        self.assertEqual(facade.get_reviews_by_place(place.id), [review])
+        facade.delete_review(review.id)
+        self.assertEqual(facade.get_reviews_by_place(place.id), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+
+class TestSlotModels(unittest.TestCase):
+    def setUp(self):
+        self.owner = User(first_name="Slot", last_name="Owner", email=f"slot.owner.{id(self)}@example.com",
+                          password="secret")
+        self.place = Place(title="Loft", price=80, latitude=45.0, longitude=5.0, owner=self.owner)
+
+    def test_instances_have_no_dict(self):
+        review = Review(text="Nice", rating=4, place=self.place, user=self.owner)
+        for obj in (self.owner, self.place, review, Amenity(name="Sauna")):
+            self.assertFalse(hasattr(obj, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.place.nickname = "nope"
+
+    def test_setters_still_validate(self):
+        with self.assertRaises(ValueError):
+            self.place.latitude = 120.0
+        with self.assertRaises(TypeError):
+            self.place.owner = "not a user"
+        self.assertEqual(self.place.latitude, 45.0)
+
+    def test_relations_stay_lists(self):
+        self.assertEqual(self.place.reviews, [])
+        self.assertEqual(self.place.amenities, [])
+        self.assertEqual(self.owner.places, [])
+        review = Review(text="Great", rating=5, place=self.place, user=self.owner)
+        self.place.add_review(review)
+        self.assertEqual(self.place.reviews, [review])
+        self.place.delete_review(review)
+        self.assertEqual(self.place.reviews, [])
+        with self.assertRaises(ValueError):
+            self.place.delete_review(review)
+
+    def test_add_amenity_appends(self):
+        sauna, pool = Amenity(name="Sauna"), Amenity(name="Pool")
+        self.place.add_amenity(sauna)
+        self.place.amenities.append(pool)
+        self.assertEqual(self.place.amenities, [sauna, pool])
+
+
+if __name__ == "__main__":
+    unittest.main()
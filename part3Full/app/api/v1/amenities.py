@@ -1,5 +1,11 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services.facade_instance import facade
+from app.extensions import response_cache
+from app.api.v1.pagination import (PAGINATION_PARAMS, COUNT_PARAMS, parse_pagination_args,
+                                   parse_count_mode, paginated_response)
+from app.api.v1.conditional import evaluate
+from app.api.v1.export import EXPORT_PARAMS, export_batch_size, export_response
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 
 api = Namespace('amenities', description='Amenity operations')
@@ -53,23 +59,57 @@ class AmenityList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params=dict(PAGINATION_PARAMS, **COUNT_PARAMS))
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid pagination parameters')
+    @response_cache.cached('amenities')
     def get(self):
         """Retrieve a list of all amenities (PUBLIC)"""
-        amenities = facade.get_all_amenities()
-        return [amenity.to_dict() for amenity in amenities], 200
+        not_modified, headers = evaluate(*facade.get_amenities_version(), request.query_string, dated=False)
+        if not_modified:
+            return None, 304, headers
+        try:
+            page = parse_pagination_args(request.args)
+            count_mode = parse_count_mode(request.args)
+            if count_mode:
+                headers['X-Total-Count'] = str(facade.count_amenities(count_mode == 'exact'))
+            if page is None:
+                amenities = facade.get_all_amenities()
+                return [amenity.to_dict() for amenity in amenities], 200, headers
+            amenities, next_cursor = facade.get_amenities_page(*page)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return paginated_response([amenity.to_dict() for amenity in amenities], next_cursor, headers)
 
 
+@api.route('/export')
+class AmenityExport(Resource):
+    @api.doc(params=EXPORT_PARAMS)
+    @api.response(200, 'Amenities streamed as NDJSON')
+    @api.response(400, 'Unsupported export format')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def get(self):
+        """Export every amenity as newline-delimited JSON (ADMIN)"""
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+        return export_response(facade.iter_amenities(export_batch_size()), 'amenities')
+
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(304, 'Not modified')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         """Get amenity details by ID (PUBLIC)"""
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
-        return amenity.to_dict(), 200
+        not_modified, headers = evaluate(amenity.updated_at, amenity.id)
+        if not_modified:
+            return None, 304, headers
+        return amenity.to_dict(), 200, headers
 
     @api.expect(amenity_model)
     @api.response(200, 'Amenity updated successfully')
@@ -91,8 +131,7 @@ class AmenityResource(Resource):
 
         amenity_data = api.payload
         try:
-            facade.update_amenity(amenity_id, amenity_data)
-            updated_amenity = facade.get_amenity(amenity_id)
+            updated_amenity = facade.update_amenity(amenity_id, amenity_data)
             return updated_amenity.to_dict(), 200
         except Exception as e:
             return {'error': str(e)}, 400
@@ -2,6 +2,7 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from flask import request
 from app.services.facade_instance import facade
+from app.hashing import PasswordHasherBusy
 
 api = Namespace('auth', description='Authentication operations')
 
@@ -16,6 +17,7 @@ class Login(Resource):
     @api.response(200, 'Login successful')
     @api.response(400, 'Invalid input')
     @api.response(401, 'Invalid credentials')
+    @api.response(429, 'Too many login attempts in progress')
     def post(self):
         """Authenticate user and return a JWT token"""
         try:
@@ -57,7 +59,9 @@ class Login(Resource):
             print(f"Token created")
             
             return {'access_token': access_token}, 200
-            
+
+        except PasswordHasherBusy:
+            return {'error': 'Too many requests, please retry later'}, 429, {'Retry-After': '1'}
         except Exception as e:
             print(f"EXCEPTION: {str(e)}")
             import traceback
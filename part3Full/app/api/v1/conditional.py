@@ -0,0 +1,48 @@
+from datetime import timezone
+from email.utils import format_datetime
+from hashlib import sha1
+from flask import request
+
+
+def evaluate(last_modified, *parts, dated=True):
+    """
+    Build the validators of a representation and match them against the request
+
+    The weak ETag hashes last_modified with any extra parts that identify
+    the representation (row counts, query string...). Returns
+    (not_modified, headers): when not_modified is True the caller answers
+    304 with the headers and skips serialization entirely.
+
+    Pass dated=False for collections: their newest updated_at moves
+    backwards when a row is deleted, so they get no Last-Modified and
+    If-Modified-Since is ignored, leaving the ETag and its row counts to
+    catch the change.
+    """
+    last_modified = _as_utc(last_modified)
+    tag = sha1('|'.join([last_modified.isoformat() if last_modified else '']
+                        + [str(part) for part in parts]).encode('utf-8')).hexdigest()[:24]
+    headers = {'ETag': f'W/"{tag}"'}
+    if not dated:
+        last_modified = None
+    if last_modified:
+        headers['Last-Modified'] = format_datetime(last_modified.replace(microsecond=0), usegmt=True)
+
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(tag), headers
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since, headers
+    return False, headers
+
+
+def latest(*timestamps):
+    """Most recent of the given timestamps, ignoring missing ones"""
+    timestamps = [_as_utc(ts) for ts in timestamps if ts is not None]
+    return max(timestamps) if timestamps else None
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -0,0 +1,27 @@
+import json
+from flask import Response, current_app, request, stream_with_context
+
+EXPORT_PARAMS = {'format': "Export format, only 'ndjson' is supported"}
+
+
+def export_batch_size():
+    return current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+
+
+def export_response(objects, name):
+    """
+    Stream objects as newline-delimited JSON, one to_dict() per line
+
+    Lines are written as the repository yields rows, so memory use does not
+    grow with the collection. Returns a 400 tuple for unsupported formats.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format != 'ndjson':
+        return {'error': f"Unsupported export format: {export_format}"}, 400
+
+    def generate():
+        for obj in objects:
+            yield json.dumps(obj.to_dict(), default=str) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename={name}.ndjson'})
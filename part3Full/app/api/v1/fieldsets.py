@@ -0,0 +1,29 @@
+FIELDS_PARAM = {'fields': 'Comma-separated list of fields to return (default: all fields)'}
+
+
+def parse_fields(args, model):
+    """
+    Read the fields= query parameter against the public fields of a model
+
+    Returns None when the parameter is absent, otherwise the requested
+    field names with 'id' always first. Raises ValueError for unknown or
+    private fields.
+    """
+    raw = args.get('fields')
+    if raw is None:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    if not fields:
+        raise ValueError("fields must list at least one field")
+    unknown = [name for name in fields if name not in model.public_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. "
+                         f"Available: {', '.join(model.public_fields)}")
+    return ['id'] + [name for name in dict.fromkeys(fields) if name != 'id']
+
+
+def render(obj, fields, full=None):
+    """Serialize obj with the requested fieldset, or in full when there is none"""
+    if fields is None:
+        return full() if full else obj.to_dict()
+    return obj.project(fields)
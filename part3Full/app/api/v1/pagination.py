@@ -0,0 +1,51 @@
+from flask import current_app
+
+PAGINATION_PARAMS = {
+    'limit': 'Maximum number of items to return (enables cursor pagination)',
+    'after': 'Opaque cursor returned in the X-Next-Cursor header of the previous page'
+}
+
+COUNT_PARAMS = {
+    'count': "Add the total number of matches in X-Total-Count: 'exact' or 'approximate'"
+}
+
+
+def parse_count_mode(args):
+    """Read the count query parameter: None, 'exact' or 'approximate'"""
+    mode = args.get('count')
+    if mode is not None and mode not in ('exact', 'approximate'):
+        raise ValueError("count must be 'exact' or 'approximate'")
+    return mode
+
+
+def parse_pagination_args(args):
+    """
+    Read the limit/after query parameters
+
+    Returns None when the client did not ask for pagination, otherwise a
+    (limit, after) tuple. Raises ValueError on invalid input.
+    """
+    limit = args.get('limit')
+    after = args.get('after')
+    if limit is None and after is None:
+        return None
+
+    max_limit = current_app.config.get('PAGINATION_MAX_LIMIT', 100)
+    if limit is None:
+        limit = current_app.config.get('PAGINATION_DEFAULT_LIMIT', 20)
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    return min(limit, max_limit), after or None
+
+
+def paginated_response(items, next_cursor, headers=None):
+    """Build the (body, status, headers) tuple of a page"""
+    headers = dict(headers or {})
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    return items, 200, headers
@@ -1,5 +1,13 @@
+from flask import request, current_app
 from flask_restx import Namespace, Resource, fields
 from app.services.facade_instance import facade
+from app.extensions import response_cache
+from app.api.v1.pagination import (PAGINATION_PARAMS, COUNT_PARAMS, parse_pagination_args,
+                                   parse_count_mode, paginated_response)
+from app.api.v1.conditional import evaluate, latest
+from app.api.v1.export import EXPORT_PARAMS, export_batch_size, export_response
+from app.api.v1.fieldsets import FIELDS_PARAM, parse_fields, render
+from app.models.place import Place
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 api = Namespace('places', description='Place operations')
@@ -34,6 +42,22 @@ place_model = api.model('Place', {
     'amenities': fields.List(fields.String, required=True, description="List of amenities ID's")
 })
 
+def _float_arg(name, low, high=None):
+    """Read an optional numeric query parameter, raising ValueError when out of range"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if high is None and value < low:
+        raise ValueError(f"{name} must be at least {low}")
+    if high is not None and not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+
 @api.route('/places/<place_id>')
 class AdminPlaceModify(Resource):
     @jwt_required()
@@ -75,7 +99,7 @@ class PlaceList(Resource):
 
         # Verify owner exists
         owner_id = place_data.get('owner_id', current_user_id)
-        user = facade.user_repo.get(owner_id)
+        user = facade.get_user(owner_id)
         if not user:
             return {'error': 'Owner not found'}, 400
 
@@ -85,22 +109,172 @@ class PlaceList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params=dict(PAGINATION_PARAMS, **FIELDS_PARAM, **COUNT_PARAMS, **{
+        'min_price': 'Minimum price per night',
+        'max_price': 'Maximum price per night',
+        'sort': 'Sort order: created_at (default), price or -price',
+        'amenities': 'Comma-separated amenity IDs the places must offer',
+        'amenities_mode': "'all' (default) to require every amenity, 'any' for at least one"
+    }))
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid query parameters')
+    @response_cache.cached('places', 'users', 'amenities')
     def get(self):
         """Retrieve a list of all places (PUBLIC)"""
-        places = facade.get_all_places()
-        return [place.to_dict() for place in places], 200
+        try:
+            fields = parse_fields(request.args, Place)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        # Embedded owners, amenities and reviews change without touching the places
+        versions = [facade.get_places_version()]
+        if fields is not None and 'owner' in fields:
+            versions.append(facade.get_users_version())
+        if fields is not None and 'amenities' in fields:
+            versions.append(facade.get_amenities_version())
+        if fields is not None and 'reviews' in fields:
+            versions.append(facade.get_reviews_version())
+        not_modified, headers = evaluate(latest(*[updated_at for updated_at, _ in versions]),
+                                         *[count for _, count in versions], request.query_string, dated=False)
+        if not_modified:
+            return None, 304, headers
+        try:
+            limit, after = parse_pagination_args(request.args) or (None, None)
+            count_mode = parse_count_mode(request.args)
+            filters = {
+                'min_price': _float_arg('min_price', 0),
+                'max_price': _float_arg('max_price', 0),
+                'amenity_ids': [a for a in request.args.get('amenities', '').split(',') if a],
+                'amenity_mode': request.args.get('amenities_mode', 'all'),
+            }
+            places, next_cursor = facade.find_places(
+                sort=request.args.get('sort', 'created_at'),
+                fields=fields,
+                limit=limit,
+                after=after,
+                **filters
+            )
+            if count_mode:
+                headers['X-Total-Count'] = str(facade.count_places(count_mode == 'exact', **filters))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return paginated_response([render(place, fields) for place in places], next_cursor, headers)
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.doc(params=dict(PAGINATION_PARAMS, **{
+        'q': 'Words to look for in the titles, descriptions and reviews of the places',
+        'lat': 'Latitude of the centre of a radius search',
+        'lon': 'Longitude of the centre of a radius search',
+        'radius_km': 'Search radius in kilometres',
+        'min_lat': 'Southern edge of a bounding-box search',
+        'min_lon': 'Western edge of a bounding-box search, above max_lon across the antimeridian',
+        'max_lat': 'Northern edge of a bounding-box search',
+        'max_lon': 'Eastern edge of a bounding-box search'
+    }))
+    @api.response(200, 'Matching places, best text match or nearest first')
+    @api.response(400, 'Invalid search parameters')
+    @response_cache.cached('places')
+    def get(self):
+        """Search places by text, around a point or inside a bounding box (PUBLIC)"""
+        try:
+            page = parse_pagination_args(request.args)
+            limit, after = page or (current_app.config.get('PAGINATION_DEFAULT_LIMIT', 20), None)
+
+            if 'q' in request.args:
+                if not request.args['q'].strip():
+                    raise ValueError("q must not be empty")
+                results, next_cursor = facade.search_places_text(request.args['q'], limit, after)
+                items = [dict(place.to_dict(), score=round(score, 4)) for score, place in results]
+                return paginated_response(items, next_cursor)
+
+            lat, lon = _float_arg('lat', -90, 90), _float_arg('lon', -180, 180)
+            radius_km = _float_arg('radius_km', 0, current_app.config.get('GEO_SEARCH_MAX_RADIUS_KM', 500))
+            box = [_float_arg('min_lat', -90, 90), _float_arg('min_lon', -180, 180),
+                   _float_arg('max_lat', -90, 90), _float_arg('max_lon', -180, 180)]
+
+            if None not in (lat, lon, radius_km):
+                results, next_cursor = facade.search_places_nearby(lat, lon, radius_km, limit, after)
+            elif None not in box:
+                # min_lon > max_lon is a box crossing the antimeridian
+                if box[0] > box[2]:
+                    raise ValueError("min_lat must not exceed max_lat")
+                results, next_cursor = facade.search_places_in_box(*box, limit, after)
+            else:
+                raise ValueError("Provide q, lat, lon and radius_km, or min_lat, min_lon, max_lat and max_lon")
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        items = [dict(place.to_dict(), distance_km=round(distance, 3)) for distance, place in results]
+        return paginated_response(items, next_cursor)
+
+
+@api.route('/suggest')
+class PlaceSuggest(Resource):
+    @api.doc(params={
+        'prefix': 'Beginning of the title, case and accents are ignored',
+        'limit': 'Maximum number of suggestions'
+    })
+    @api.response(200, 'Places whose title starts with the prefix, alphabetically')
+    @api.response(400, 'Invalid prefix or limit')
+    def get(self):
+        """Suggest place titles for typeahead (PUBLIC)"""
+        prefix = request.args.get('prefix', '')
+        if not prefix.strip():
+            return {'error': 'prefix is required'}, 400
+        try:
+            limit = int(request.args.get('limit', current_app.config.get('SUGGEST_DEFAULT_LIMIT', 10)))
+        except ValueError:
+            return {'error': 'limit must be an integer'}, 400
+        if limit < 1:
+            return {'error': 'limit must be positive'}, 400
+        limit = min(limit, current_app.config.get('SUGGEST_MAX_LIMIT', 50))
+        return [{'id': place_id, 'title': title}
+                for place_id, title in facade.suggest_places(prefix, limit)], 200
+
+
+@api.route('/export')
+class PlaceExport(Resource):
+    @api.doc(params=EXPORT_PARAMS)
+    @api.response(200, 'Places streamed as NDJSON')
+    @api.response(400, 'Unsupported export format')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def get(self):
+        """Export every place as newline-delimited JSON (ADMIN)"""
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+        return export_response(facade.iter_places(export_batch_size()), 'places')
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
+    @api.doc(params=FIELDS_PARAM)
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid fields')
     @api.response(404, 'Place not found')
+    @response_cache.cached('place:{place_id}', 'users', 'amenities')
     def get(self, place_id):
         """Get place details by ID (PUBLIC)"""
-        place = facade.get_place(place_id)
+        try:
+            fields = parse_fields(request.args, Place)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        place = facade.get_place(place_id, profile='detail', fields=fields)
         if not place:
             return {'error': 'Place not found'}, 404
-        return place.to_dict_list(), 200
+        # Only look at the relationships the response embeds
+        owner = place.owner if fields is None or 'owner' in fields else None
+        amenities = place.amenities if fields is None or 'amenities' in fields else []
+        reviews = place.reviews if fields is None or 'reviews' in fields else []
+        last_modified = latest(place.updated_at, owner.updated_at if owner else None,
+                               *[a.updated_at for a in amenities],
+                               *[r.updated_at for r in reviews])
+        not_modified, headers = evaluate(last_modified, place.id, len(amenities), len(reviews),
+                                         request.args.get('fields', ''))
+        if not_modified:
+            return None, 304, headers
+        return render(place, fields, place.to_dict_list), 200, headers
 
     @api.expect(place_model)
     @api.response(200, 'Place updated successfully')
@@ -109,7 +283,7 @@ class PlaceResource(Resource):
     @jwt_required()
     def put(self, place_id):
         """Update a place's information"""
-        place = facade.get_place(place_id)
+        place = facade.get_place(place_id, profile='summary')
         if not place:
             return {'error': 'Place not found'}, 404
         
@@ -128,8 +302,7 @@ class PlaceResource(Resource):
             return {'error': 'You cannot change the owner of a place'}, 400
 
         try:
-            facade.update_place(place_id, place_data)
-            updated_place = facade.get_place(place_id)
+            updated_place = facade.update_place(place_id, place_data)
             return updated_place.to_dict(), 200
         except Exception as e:
             return {'error': str(e)}, 400
@@ -150,7 +323,7 @@ class PlaceResource(Resource):
             return {'error': 'Unauthorized action'}, 403
 
         try:
-            facade.place_repo.delete(place_id)
+            facade.delete_place(place_id)
             return {'message': 'Place deleted successfully'}, 200
         except Exception as e:
             return {'error': str(e)}, 400
@@ -165,7 +338,7 @@ class PlaceAmenities(Resource):
     def post(self, place_id):
         """Add amenities to a place"""
         amenities_data = api.payload
-        if not amenities_data or len(amenities_data) == 0:
+        if not amenities_data or not isinstance(amenities_data, (list, dict)):
             return {'error': 'Invalid input data'}, 400
         
         place = facade.get_place(place_id)
@@ -180,26 +353,31 @@ class PlaceAmenities(Resource):
         if not is_admin and str(place.owner.id) != current_user_id:
             return {'error': 'Unauthorized action'}, 403
 
-        for amenity in amenities_data:
-            a = facade.get_amenity(amenity['id'])
-            if not a:
-                return {'error': 'Invalid input data'}, 400
-        
-        for amenity in amenities_data:
-            place.add_amenity(amenity)
+        if isinstance(amenities_data, dict):
+            amenities_data = [amenities_data]
+
+        try:
+            facade.add_amenities_to_place(place, amenities_data)
+        except ValueError:
+            return {'error': 'Invalid input data'}, 400
         return {'message': 'Amenities added successfully'}, 200
 
 
 @api.route('/<place_id>/reviews/')
 class PlaceReviewList(Resource):
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(304, 'Not modified')
     @api.response(404, 'Place not found')
+    @response_cache.cached('place:{place_id}')
     def get(self, place_id):
         """Get all reviews for a specific place (PUBLIC)"""
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
-        return [review.to_dict() for review in place.reviews], 200
+        not_modified, headers = evaluate(*facade.get_reviews_version(place_id), place_id, dated=False)
+        if not_modified:
+            return None, 304, headers
+        return [review.to_dict() for review in place.reviews], 200, headers
     
     @api.expect(api.model('ReviewInput', {
         'text': fields.String(required=True, description='Review text'),
@@ -220,6 +398,9 @@ class PlaceReviewList(Resource):
         review_data = api.payload
         review_data['place_id'] = place_id
         review_data['user_id'] = current_user_id
+
+        if facade.has_reviewed(place_id, current_user_id):
+            return {'error': 'You have already reviewed this place'}, 400
         
         try:
             new_review = facade.create_review(review_data)
@@ -1,5 +1,12 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services.facade_instance import facade
+from app.api.v1.pagination import (PAGINATION_PARAMS, COUNT_PARAMS, parse_pagination_args,
+                                   parse_count_mode, paginated_response)
+from app.api.v1.conditional import evaluate
+from app.api.v1.export import EXPORT_PARAMS, export_batch_size, export_response
+from app.api.v1.fieldsets import FIELDS_PARAM, parse_fields, render
+from app.models.review import Review
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 api = Namespace('reviews', description='Review operations')
@@ -45,20 +52,15 @@ class ReviewList(Resource):
         if not user:
             return {'error': 'User not found'}, 400
 
-        # Admins can bypass these restrictions
+        # Admins can review their own places
         if not is_admin:
             # Regular users cannot review their own place
             if str(place.owner.id) == current_user_id:
                 return {'error': 'You cannot review your own place'}, 400
-            
-            # Regular users can only review once per place
-            try:
-                existing_reviews = facade.get_reviews_by_place(place.id)
-                for review in existing_reviews:
-                    if str(review.user.id) == current_user_id:
-                        return {'error': 'You have already reviewed this place'}, 400
-            except Exception:
-                pass
+
+        # One review per user and place, enforced by a unique index
+        if facade.has_reviewed(place.id, user_id):
+            return {'error': 'You have already reviewed this place'}, 400
 
         try:
             new_review = facade.create_review(review_data)
@@ -66,21 +68,61 @@ class ReviewList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params=dict(PAGINATION_PARAMS, **FIELDS_PARAM, **COUNT_PARAMS))
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid pagination parameters')
     def get(self):
         """Retrieve a list of all reviews"""
-        return [review.to_dict() for review in facade.get_all_reviews()], 200
+        not_modified, headers = evaluate(*facade.get_reviews_version(), request.query_string, dated=False)
+        if not_modified:
+            return None, 304, headers
+        try:
+            page = parse_pagination_args(request.args)
+            fields = parse_fields(request.args, Review)
+            count_mode = parse_count_mode(request.args)
+            if count_mode:
+                headers['X-Total-Count'] = str(facade.count_reviews(count_mode == 'exact'))
+            if page is None:
+                return [render(review, fields) for review in facade.get_all_reviews(fields=fields)], 200, headers
+            reviews, next_cursor = facade.get_reviews_page(*page, fields=fields)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return paginated_response([render(review, fields) for review in reviews], next_cursor, headers)
+
+@api.route('/export')
+class ReviewExport(Resource):
+    @api.doc(params=EXPORT_PARAMS)
+    @api.response(200, 'Reviews streamed as NDJSON')
+    @api.response(400, 'Unsupported export format')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def get(self):
+        """Export every review as newline-delimited JSON (ADMIN)"""
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+        return export_response(facade.iter_reviews(export_batch_size()), 'reviews')
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
+    @api.doc(params=FIELDS_PARAM)
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid fields')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         """Get review details by ID"""
-        review = facade.get_review(review_id)
+        try:
+            fields = parse_fields(request.args, Review)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        review = facade.get_review(review_id, fields=fields)
         if not review:
             return {'error': 'Review not found'}, 404
-        return review.to_dict(), 200
+        not_modified, headers = evaluate(review.updated_at, review.id, request.args.get('fields', ''))
+        if not_modified:
+            return None, 304, headers
+        return render(review, fields), 200, headers
 
     @api.expect(review_model)
     @api.response(200, 'Review updated successfully')
@@ -107,8 +149,7 @@ class ReviewResource(Resource):
             return {'error': 'You cannot change user_id or place_id'}, 400
         
         try:
-            facade.update_review(review_id, api.payload)
-            updated_review = facade.get_review(review_id)
+            updated_review = facade.update_review(review_id, api.payload)
             return updated_review.to_dict(), 200
         except Exception as e:
             return {'error': str(e)}, 400
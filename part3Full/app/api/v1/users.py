@@ -1,5 +1,14 @@
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from app.services.facade_instance import facade
+from app.extensions import password_hasher
+from app.hashing import PasswordHasherBusy
+from app.api.v1.pagination import (PAGINATION_PARAMS, COUNT_PARAMS, parse_pagination_args,
+                                   parse_count_mode, paginated_response)
+from app.api.v1.conditional import evaluate
+from app.api.v1.export import EXPORT_PARAMS, export_batch_size, export_response
+from app.api.v1.fieldsets import FIELDS_PARAM, parse_fields, render
+from app.models.user import User
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 api = Namespace('users', description='User operations')
@@ -20,6 +29,7 @@ class UserList(Resource):
     @api.response(403, 'Admin privileges required')
     @api.response(409, 'Email already registered')
     @api.response(400, 'Invalid input data')
+    @api.response(429, 'Password hashing pool saturated')
     def post(self):
         """Create a new user. First user = admin automatically, next users = admin only."""
         user_data = api.payload
@@ -30,50 +40,92 @@ class UserList(Resource):
         if facade.get_user_by_email(user_data['email']):
             return {'error': 'Email already registered'}, 409
 
-        users_exist = facade.get_users()
-
-        if len(users_exist) == 0:
-            user_data['is_admin'] = True
-        else:
+        if facade.has_users():
             from flask_jwt_extended import verify_jwt_in_request, get_jwt
             try:
                 verify_jwt_in_request()
-                claims = get_jwt()
-                if not claims.get('is_admin', False):
-                    return {'error': 'Admin privileges required'}, 403
+                is_admin = get_jwt().get('is_admin', False)
             except Exception:
+                is_admin = False
+            # The cached answer may predate a database reset: confirm it before refusing
+            if not is_admin and facade.has_users(recheck=True):
                 return {'error': 'Admin privileges required'}, 403
+        if not facade.has_users():
+            user_data['is_admin'] = True
 
         try:
             new_user = facade.create_user(user_data)
             return new_user.to_dict(), 201
+        except PasswordHasherBusy:
+            return {'error': 'Too many requests, please retry later'}, 429, {'Retry-After': '1'}
         except Exception as e:
             return {'error': str(e)}, 400
 
         
+    @api.doc(params=dict(PAGINATION_PARAMS, **FIELDS_PARAM, **COUNT_PARAMS))
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid pagination parameters')
     def get(self):
         """Retrieve a list of users (PUBLIC)"""
-        users = facade.get_users()
-        return [user.to_dict() for user in users], 200
+        not_modified, headers = evaluate(*facade.get_users_version(), request.query_string, dated=False)
+        if not_modified:
+            return None, 304, headers
+        try:
+            page = parse_pagination_args(request.args)
+            fields = parse_fields(request.args, User)
+            count_mode = parse_count_mode(request.args)
+            if count_mode:
+                headers['X-Total-Count'] = str(facade.count_users(count_mode == 'exact'))
+            if page is None:
+                users = facade.get_users(fields=fields)
+                return [render(user, fields) for user in users], 200, headers
+            users, next_cursor = facade.get_users_page(*page, fields=fields)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return paginated_response([render(user, fields) for user in users], next_cursor, headers)
     
 
+@api.route('/export')
+class UserExport(Resource):
+    @api.doc(params=EXPORT_PARAMS)
+    @api.response(200, 'Users streamed as NDJSON')
+    @api.response(400, 'Unsupported export format')
+    @api.response(403, 'Admin privileges required')
+    @jwt_required()
+    def get(self):
+        """Export every user as newline-delimited JSON (ADMIN)"""
+        if not get_jwt().get('is_admin', False):
+            return {'error': 'Admin privileges required'}, 403
+        return export_response(facade.iter_users(export_batch_size()), 'users')
+
 @api.route('/<user_id>')
 class UserResource(Resource):
+    @api.doc(params=FIELDS_PARAM)
     @api.response(200, 'User details retrieved successfully')
+    @api.response(304, 'Not modified')
+    @api.response(400, 'Invalid fields')
     @api.response(404, 'User not found')
     def get(self, user_id):
         """Get user details by ID (PUBLIC)"""
-        user = facade.get_user(user_id)
+        try:
+            fields = parse_fields(request.args, User)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        user = facade.get_user(user_id, fields=fields)
         if not user:
             return {'error': 'User not found'}, 404
-        return user.to_dict(), 200
+        not_modified, headers = evaluate(user.updated_at, user.id, request.args.get('fields', ''))
+        if not_modified:
+            return None, 304, headers
+        return render(user, fields), 200, headers
 
     @api.expect(user_model)
     @api.response(200, 'User updated successfully')
     @api.response(404, 'User not found')
     @api.response(400, 'Invalid input data')
     @api.response(403, 'Unauthorized action')
+    @api.response(429, 'Password hashing pool saturated')
     @jwt_required()
     def put(self, user_id):
         """Update a user's information"""
@@ -108,12 +160,13 @@ class UserResource(Resource):
 
         # Admin can modify password - hash it
         if is_admin and 'password' in user_data:
-            user.hash_password(user_data['password'])
-            del user_data['password']
+            try:
+                user_data['password'] = password_hasher.hash(user_data['password'])
+            except PasswordHasherBusy:
+                return {'error': 'Too many requests, please retry later'}, 429, {'Retry-After': '1'}
 
         try:
-            facade.update_user(user_id, user_data)
-            updated_user = facade.get_user(user_id)
+            updated_user = facade.update_user(user_id, user_data)
             return updated_user.to_dict(), 200
         except Exception as e:
             return {'error': str(e)}, 400
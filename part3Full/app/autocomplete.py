@@ -0,0 +1,104 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+
+def normalize(title):
+    """Fold case, accents and spacing so 'Café  Lumière' matches 'cafe lum'"""
+    if title.isascii():
+        return ' '.join(title.lower().split())
+    decomposed = unicodedata.normalize('NFKD', title)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+class TitleIndex:
+    """
+    Sorted in-memory index of the normalized place titles, for typeahead
+
+    The (normalized title, place id) pairs are kept in one sorted list, so
+    a prefix lookup is a bisect to the first candidate followed by a scan
+    of at most limit entries. The list is built on the first lookup from
+    the titles the loader yields, and the facade adds, replaces and removes
+    entries as places are written. Writes made by other processes (other
+    workers, bulk imports) show up once the index is older than
+    TITLE_INDEX_TTL seconds and gets rebuilt; the stale index keeps
+    answering while one request rebuilds it.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self._entries = None
+        self._titles = {}
+        self._expires = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('TITLE_INDEX_TTL', self.ttl)
+        self.clear()
+
+    def suggest(self, prefix, limit, load):
+        """
+        Return up to limit (place_id, title) pairs whose title starts with prefix
+
+        load() yields the (place_id, title) pairs of every place; it is only
+        called when the index has to be (re)built.
+        """
+        prefix = normalize(prefix)
+        if self._entries is None or self._expires < time.monotonic():
+            self._refresh(load)
+        with self._lock:
+            matches = []
+            position = bisect_left(self._entries, (prefix,))
+            for key, place_id in self._entries[position:position + limit]:
+                if not key.startswith(prefix):
+                    break
+                matches.append((place_id, self._titles[place_id]))
+            return matches
+
+    def add(self, place_id, title):
+        """Index a new place, or the new title of an existing one"""
+        with self._lock:
+            if self._entries is None:
+                return
+            self._discard(place_id)
+            insort(self._entries, (normalize(title), place_id))
+            self._titles[place_id] = title
+
+    def remove(self, place_id):
+        with self._lock:
+            if self._entries is not None:
+                self._discard(place_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries = None
+            self._titles = {}
+
+    def _refresh(self, load):
+        # Only the first lookup waits for a build, later ones use the stale index
+        if not self._build_lock.acquire(blocking=self._entries is None):
+            return
+        try:
+            if self._entries is not None and self._expires >= time.monotonic():
+                return
+            titles = dict(load())
+            entries = sorted((normalize(title), place_id) for place_id, title in titles.items())
+            with self._lock:
+                self._entries, self._titles = entries, titles
+                self._expires = time.monotonic() + self.ttl
+        finally:
+            self._build_lock.release()
+
+    def _discard(self, place_id):
+        title = self._titles.pop(place_id, None)
+        if title is None:
+            return
+        entry = (normalize(title), place_id)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
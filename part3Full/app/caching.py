@@ -0,0 +1,137 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import request
+from werkzeug.http import parse_date, unquote_etag
+
+
+class ResponseCache:
+    """
+    In-process LRU/TTL cache for the responses of public GET endpoints
+
+    Entries are keyed by path and normalized query string and carry tags
+    (e.g. 'places', 'place:<id>'). The facade write methods invalidate the
+    tags they affect, so cached pages are dropped as soon as their data
+    changes in this process; RESPONSE_CACHE_TTL bounds how long another
+    worker process can serve a stale copy.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_entries = 1024
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', self.enabled)
+        self.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def cached(self, *tags):
+        """
+        Cache the 200 responses of a resource method
+
+        Tags are formatted with the view arguments, so 'place:{place_id}'
+        tags the entry with the requested place.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+                key = self._request_key()
+                entry = self.get(key)
+                if entry is not None:
+                    body, status, headers = entry
+                    if _not_modified(headers):
+                        return None, 304, dict(headers, **{'X-Cache': 'HIT'})
+                    return body, status, dict(headers, **{'X-Cache': 'HIT'})
+
+                body, status, headers = _unpack(view(*args, **kwargs))
+                if status == 200:
+                    self.set(key, (body, status, headers), [tag.format(**kwargs) for tag in tags])
+                return body, status, dict(headers, **{'X-Cache': 'MISS'})
+            return wrapper
+        return decorator
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying one of the tags"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    @staticmethod
+    def _request_key():
+        args = sorted(request.args.items(multi=True))
+        return f"{request.path}?{urlencode(args)}"
+
+
+def _unpack(result):
+    """Normalize a resource return value to (body, status, headers)"""
+    if not isinstance(result, tuple):
+        return result, 200, {}
+    status = result[1] if len(result) > 1 else 200
+    headers = dict(result[2]) if len(result) > 2 and result[2] else {}
+    return result[0], status, headers
+
+
+def _not_modified(headers):
+    """Match the conditional headers of the request against a cached response"""
+    if request.if_none_match:
+        return 'ETag' in headers and request.if_none_match.contains_weak(unquote_etag(headers['ETag'])[0])
+    if request.if_modified_since and 'Last-Modified' in headers:
+        return parse_date(headers['Last-Modified']) <= request.if_modified_since
+    return False
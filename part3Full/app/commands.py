@@ -0,0 +1,126 @@
+import json
+import os
+import click
+from flask.cli import with_appcontext
+
+
+def init_app(app):
+    """Register the maintenance commands on the flask CLI"""
+    app.cli.add_command(seed)
+    app.cli.add_command(import_data)
+    app.cli.add_command(ensure_indexes)
+    app.cli.add_command(rebuild_search_index)
+    app.cli.add_command(rebuild_ratings)
+    app.cli.add_command(rebuild_geohashes)
+    app.cli.add_command(rebuild_amenity_masks)
+
+
+@click.command('seed')
+@with_appcontext
+def seed():
+    """Create the tables and the test data if they are missing."""
+    from app.seed import seed_database
+    seed_database()
+    click.echo("Database seeded")
+
+
+@click.command('ensure-indexes')
+@click.option('--dry-run', is_flag=True, help='Only list the missing indexes.')
+@with_appcontext
+def ensure_indexes(dry_run):
+    """Create the declared and the text search indexes that the database lacks."""
+    from app.extensions import db, search_index
+    from app.persistence import indexes
+
+    if dry_run:
+        for index in indexes.missing_indexes(db.engine):
+            click.echo(f"missing: {index.name} on {index.table.name} "
+                       f"({', '.join(column.name for column in index.columns)})")
+        return
+    created, failed = indexes.ensure_indexes()
+    search_created, search_failed = search_index.ensure_indexes()
+    created += search_created
+    failed += search_failed
+    for name in created:
+        click.echo(f"created: {name}")
+    for name, error in failed:
+        click.echo(f"failed: {name}: {error}", err=True)
+    if not created and not failed:
+        click.echo("All declared indexes exist")
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index():
+    """Reindex every place for the text search."""
+    from app.extensions import search_index
+    indexed = search_index.rebuild()
+    click.echo(f"{indexed} places indexed")
+
+
+@click.command('rebuild-ratings')
+@with_appcontext
+def rebuild_ratings():
+    """Recompute the rating aggregates of every place from its reviews."""
+    from app.services.facade_instance import facade
+    facade.place_repo.recompute_rating_aggregates()
+    click.echo("Rating aggregates rebuilt")
+
+
+@click.command('rebuild-geohashes')
+@with_appcontext
+def rebuild_geohashes():
+    """Fill the geohash of the places stored before the geo search existed."""
+    from app.services.facade_instance import facade
+    facade.place_repo.rebuild_geohashes()
+    click.echo("Geohashes rebuilt")
+
+
+@click.command('rebuild-amenity-masks')
+@with_appcontext
+def rebuild_amenity_masks():
+    """Assign missing amenity bits and recompute the amenity mask of every place."""
+    from app.services.facade_instance import facade
+    facade.amenity_repo.assign_missing_bits()
+    facade.place_repo.rebuild_amenity_masks()
+    click.echo("Amenity masks rebuilt")
+
+
+@click.command('import-data')
+@click.argument('kind', type=click.Choice(['users', 'amenities', 'places', 'reviews']))
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']),
+              help='Input format, guessed from the file extension by default.')
+@click.option('--chunk-size', default=5000, show_default=True,
+              help='Rows validated and written per transaction.')
+@click.option('--errors', 'errors_file', type=click.File('w', encoding='utf-8'),
+              help='Write every rejected row as NDJSON to this file.')
+@with_appcontext
+def import_data(kind, source, fmt, chunk_size, errors_file):
+    """Bulk import KIND rows from an NDJSON or CSV SOURCE file.
+
+    Import users and amenities before the places that reference them, and
+    places before reviews. Users accept either a password or an existing
+    bcrypt password_hash.
+    """
+    from app.services.bulk_import import BulkImporter, read_rows
+
+    if fmt is None:
+        fmt = 'csv' if os.path.splitext(source.name)[1].lower() == '.csv' else 'ndjson'
+
+    def progress(report):
+        click.echo(f"{report.imported} {kind} imported, {len(report.errors)} rejected "
+                   f"({report.rows_per_second:.0f} rows/s)")
+
+    importer = BulkImporter(chunk_size=chunk_size, on_chunk=progress)
+    report = importer.run(kind, read_rows(source, fmt))
+
+    for error in report.errors[:20]:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    if len(report.errors) > 20:
+        click.echo(f"... {len(report.errors) - 20} more errors", err=True)
+    if errors_file:
+        for error in report.errors:
+            errors_file.write(json.dumps(error) + '\n')
+    click.echo(f"Done: {report.imported} {kind} imported, {len(report.errors)} rejected "
+               f"in {report.elapsed:.2f}s ({report.rows_per_second:.0f} rows/s)")
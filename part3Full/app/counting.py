@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+class RowCounters:
+    """
+    Row counts of the listings, kept in memory by the facade
+
+    Each table has one counter that the facade moves on every create and
+    delete, so approximate counts cost nothing. Counts of filtered
+    listings are cached per filter set and dropped whenever the table
+    changes. Every entry is re-read with COUNT(*) once older than
+    ROW_COUNT_TTL, which bounds the drift caused by other worker processes;
+    exact counts always run COUNT(*) and refresh the entry.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 60
+        self._counts = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('ROW_COUNT_TTL', self.ttl)
+        self.clear()
+
+    def get(self, key, count_rows, exact=False):
+        """Return the count stored under key, running count_rows() when needed"""
+        if not exact:
+            with self._lock:
+                entry = self._counts.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+        value = count_rows()
+        with self._lock:
+            self._counts[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def adjust(self, table, delta):
+        """Move the table counter and forget the filtered counts of the table"""
+        with self._lock:
+            entry = self._counts.get(table)
+            if entry is not None:
+                self._counts[table] = (max(entry[0] + delta, 0), entry[1])
+            self._drop_filtered(table)
+
+    def invalidate_filtered(self, table):
+        """Forget the filtered counts of a table whose rows changed in place"""
+        with self._lock:
+            self._drop_filtered(table)
+
+    def invalidate(self, table):
+        """Forget every count of the table"""
+        with self._lock:
+            self._counts.pop(table, None)
+            self._drop_filtered(table)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def _drop_filtered(self, table):
+        for key in [key for key in self._counts if isinstance(key, tuple) and key[0] == table]:
+            del self._counts[key]
@@ -1,7 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from app.hashing import PasswordHasher
+from app.caching import ResponseCache
+from app.counting import RowCounters
+from app.search import SearchIndex
+from app.autocomplete import TitleIndex
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 jwt = JWTManager()
+password_hasher = PasswordHasher(bcrypt)
+response_cache = ResponseCache()
+row_counters = RowCounters()
+search_index = SearchIndex()
+title_index = TitleIndex()
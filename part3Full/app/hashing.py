@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool cannot accept more work"""
+
+
+class PasswordHasher:
+    """
+    Run bcrypt hashing and verification on a bounded worker pool
+
+    bcrypt releases the GIL while it computes, so PASSWORD_HASH_WORKERS
+    threads bound how many hashes burn CPU at once. The calling thread
+    still waits for its result, for at most PASSWORD_HASH_TIMEOUT seconds.
+    At most PASSWORD_HASH_QUEUE_DEPTH jobs may be running or waiting at
+    once: past that, calls fail immediately with PasswordHasherBusy so the
+    API can answer 429 instead of letting a login burst starve every other
+    endpoint. A job that times out is cancelled if it has not started yet;
+    its queue slot is only given back once it has finished or been
+    cancelled, so abandoned work still counts against the limit.
+    """
+
+    def __init__(self, bcrypt, app=None):
+        self.bcrypt = bcrypt
+        self.workers = 4
+        self.queue_depth = 32
+        self.timeout = 10
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.queue_depth = max(app.config.get('PASSWORD_HASH_QUEUE_DEPTH', self.queue_depth), self.workers)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hasher')
+                self._slots = threading.BoundedSemaphore(self.queue_depth)
+            return self._executor, self._slots
+
+    def _submit(self, fn, *args, wait=False):
+        executor, slots = self._pool()
+        acquired = slots.acquire(timeout=self.timeout) if wait else slots.acquire(blocking=False)
+        if not acquired:
+            raise PasswordHasherBusy("Password hashing pool is saturated")
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # Runs once the job has finished, or right away when it is cancelled
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy("Password hashing timed out")
+
+    def hash(self, password):
+        """Return the bcrypt hash of password as a string"""
+        return self._wait(self._submit(self.bcrypt.generate_password_hash, password)).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        """Check password against a stored bcrypt hash"""
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode('utf-8')
+        return self._wait(self._submit(self.bcrypt.check_password_hash, password_hash, password))
+
+    def hash_many(self, passwords):
+        """
+        Hash a batch of passwords in parallel, in input order
+
+        Meant for bulk jobs: instead of failing as soon as the queue is full,
+        submission waits up to PASSWORD_HASH_TIMEOUT for a free slot. On
+        PasswordHasherBusy the jobs of the batch still queued are cancelled.
+        """
+        futures = []
+        try:
+            for password in passwords:
+                futures.append(self._submit(self.bcrypt.generate_password_hash, password, wait=True))
+            return [self._wait(future).decode('utf-8') for future in futures]
+        except PasswordHasherBusy:
+            for future in futures:
+                future.cancel()
+            raise
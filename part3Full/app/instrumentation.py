@@ -0,0 +1,90 @@
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context
+from sqlalchemy import event
+from app.extensions import db, response_cache
+
+# Runs of bound parameters, e.g. the expanded "IN (?, ?, ?)" of get_many
+_PARAM_RUN = re.compile(r"(\?|%s|%\(\w+\)s)(\s*,\s*(\?|%s|%\(\w+\)s))+")
+_SPACES = re.compile(r"\s+")
+
+
+def init_app(app):
+    """
+    Count the SQL statements and database time of every request
+
+    Opt-in through DB_INSTRUMENTATION. Each response gets X-DB-Queries and
+    X-DB-Time (milliseconds) headers, and a warning is logged when one
+    statement shape runs more than DB_N_PLUS_ONE_THRESHOLD times within a
+    single request, which is the signature of an N+1 query. X-Identity-Map-Hits
+    counts the facade lookups answered from the request-scoped identity map,
+    and X-Cache-Hits / X-Cache-Misses / X-Cache-Entries report the response
+    cache totals of the worker process since it started.
+    """
+    if not app.config.get('DB_INSTRUMENTATION'):
+        return
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    threshold = app.config.get('DB_N_PLUS_ONE_THRESHOLD', 10)
+
+    @app.before_request
+    def start_db_stats():
+        g.db_stats = {'queries': 0, 'time': 0.0, 'shapes': Counter(), 'identity_map_hits': 0}
+
+    @app.after_request
+    def report_db_stats(response):
+        stats = g.pop('db_stats', None)
+        if stats is None:
+            return response
+        response.headers['X-DB-Queries'] = str(stats['queries'])
+        response.headers['X-DB-Time'] = f"{stats['time'] * 1000:.2f}"
+        response.headers['X-Identity-Map-Hits'] = str(stats['identity_map_hits'])
+        cache_stats = response_cache.stats()
+        response.headers['X-Cache-Hits'] = str(cache_stats['hits'])
+        response.headers['X-Cache-Misses'] = str(cache_stats['misses'])
+        response.headers['X-Cache-Entries'] = str(cache_stats['entries'])
+        for shape, count in stats['shapes'].items():
+            if count > threshold:
+                app.logger.warning("Possible N+1: statement ran %d times during %s: %s",
+                                   count, _request_line(), shape)
+        return response
+
+
+def statement_shape(statement):
+    """Normalize a statement so repeated executions with other parameters compare equal"""
+    return _PARAM_RUN.sub(r"\1", _SPACES.sub(' ', statement)).strip()
+
+
+def _request_line():
+    from flask import request
+    return f"{request.method} {request.path}"
+
+
+def count_identity_map_hit():
+    """Record a facade lookup served without touching the repository"""
+    stats = _current_stats()
+    if stats is not None:
+        stats['identity_map_hits'] += 1
+
+
+def _current_stats():
+    if not has_request_context():
+        return None
+    return g.get('db_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    stats = _current_stats()
+    if stats is not None:
+        stats['queries'] += 1
+        stats['time'] += elapsed
+        stats['shapes'][statement_shape(statement)] += 1
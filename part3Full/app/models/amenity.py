@@ -6,6 +6,11 @@ class Amenity(BaseModel):
     """Amenity model for SQLAlchemy"""
     __tablename__ = 'amenities'
 
+    # Position of the amenity in Place.amenity_mask, assigned by AmenityRepository.
+    # Left empty once the 63 bits of the mask are used up.
+    bit = db.Column(db.Integer, nullable=True, unique=True)
+    MAX_BITS = 63
+
     name = db.Column(db.String(50), nullable=False)
 
     def __init__(self, name):
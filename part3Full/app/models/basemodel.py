@@ -6,9 +6,24 @@ class BaseModel(db.Model):
     __abstract__ = True
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Fields clients may select with ?fields=, mapped to the attributes they need loaded
+    public_fields = {}
+
+    def project(self, fields):
+        """Serialize only the given public fields"""
+        return {field: self._field_value(field) for field in fields}
+
+    def _field_value(self, field):
+        value = getattr(self, field)
+        if isinstance(value, BaseModel):
+            return value.to_dict()
+        if isinstance(value, list):
+            return [item.to_dict() for item in value]
+        return value
+
     def save(self):
         """Update the updated_at timestamp whenever the object is modified"""
         db.session.add(self)
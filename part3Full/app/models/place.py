@@ -2,6 +2,7 @@ from app.models.basemodel import BaseModel
 from sqlalchemy.orm import validates, relationship
 from app.extensions import db
 from app.models.place_amenity import place_amenity
+from app.geo import encode_geohash
 
 class Place(BaseModel):
     __tablename__ = 'places'
@@ -11,12 +12,43 @@ class Place(BaseModel):
     price = db.Column(db.Float, nullable=False, index=True)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
+    # Derived from latitude/longitude; prefix range scans on it back geo search
+    geohash = db.Column(db.String(12), nullable=True, index=True)
     
-    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Bitmap of the attached amenities (bit = Amenity.bit), kept in sync by
+    # validate_amenities so amenity filters need no join
+    amenity_mask = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+    # Rating aggregates, kept in step with the reviews by HBnBFacade
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     reviews = relationship('Review', backref='place', lazy=True, cascade='all, delete-orphan')
     amenities = relationship('Amenity', secondary=place_amenity, lazy='subquery', backref=db.backref('places', lazy=True))
     
+    public_fields = {
+        'id': ('id',),
+        'title': ('title',),
+        'description': ('description',),
+        'price': ('price',),
+        'latitude': ('latitude',),
+        'longitude': ('longitude',),
+        'owner_id': ('owner_id',),
+        'review_count': ('review_count',),
+        'average_rating': ('review_count', 'rating_sum'),
+        'rating_histogram': tuple(f'rating_{rating}_count' for rating in range(1, 6)),
+        'owner': ('owner_id', 'owner'),
+        'amenities': ('amenities',),
+        'reviews': ('reviews',),
+    }
+
     def __init__(self, title, price, latitude, longitude, owner, description=None):
         super().__init__()
         self.title = title
@@ -27,7 +59,12 @@ class Place(BaseModel):
         self.owner = owner  
         self.owner_id = owner.id if hasattr(owner, 'id') else owner
         self.reviews = []
+        self.amenity_mask = 0
         self.amenities = []
+        self.review_count = 0
+        self.rating_sum = 0
+        for rating in range(1, 6):
+            setattr(self, f'rating_{rating}_count', 0)
     
     @validates('title')
     def validate_title(self, key, value):
@@ -54,6 +91,7 @@ class Place(BaseModel):
         value = float(value)
         if not -90.0 <= value <= 90.0:
             raise ValueError("Latitude must be between -90 and 90")
+        self._refresh_geohash(value, self.longitude)
         return value
     
     @validates('longitude')
@@ -63,8 +101,23 @@ class Place(BaseModel):
         value = float(value)
         if not -180.0 <= value <= 180.0:
             raise ValueError("Longitude must be between -180 and 180")
+        self._refresh_geohash(self.latitude, value)
         return value
 
+    @validates('amenities', include_removes=True)
+    def validate_amenities(self, key, amenity, is_remove):
+        bit = getattr(amenity, 'bit', None)
+        if bit is not None:
+            if is_remove:
+                self.amenity_mask = (self.amenity_mask or 0) & ~(1 << bit)
+            else:
+                self.amenity_mask = (self.amenity_mask or 0) | (1 << bit)
+        return amenity
+
+    def _refresh_geohash(self, latitude, longitude):
+        if latitude is not None and longitude is not None:
+            self.geohash = encode_geohash(latitude, longitude)
+
     def add_review(self, review):
         self.reviews.append(review)
     
@@ -74,6 +127,30 @@ class Place(BaseModel):
     def add_amenity(self, amenity):
         self.amenities.append(amenity)
 
+    def add_rating(self, rating):
+        """Account for a new review with the given rating"""
+        self._shift_rating(rating, 1)
+
+    def remove_rating(self, rating):
+        """Account for a removed review with the given rating"""
+        self._shift_rating(rating, -1)
+
+    def _shift_rating(self, rating, delta):
+        attr = f'rating_{rating}_count'
+        self.review_count = (self.review_count or 0) + delta
+        self.rating_sum = (self.rating_sum or 0) + delta * rating
+        setattr(self, attr, (getattr(self, attr) or 0) + delta)
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    @property
+    def rating_histogram(self):
+        return {str(rating): getattr(self, f'rating_{rating}_count') or 0 for rating in range(1, 6)}
+
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -82,7 +159,10 @@ class Place(BaseModel):
             'price': self.price,
             'latitude': self.latitude,
             'longitude': self.longitude,
-            'owner_id': str(self.owner_id)
+            'owner_id': str(self.owner_id),
+            'review_count': self.review_count or 0,
+            'average_rating': self.average_rating,
+            'rating_histogram': self.rating_histogram
         }
     
     def to_dict_list(self):
@@ -94,6 +174,9 @@ class Place(BaseModel):
             'latitude': self.latitude,
             'longitude': self.longitude,
             'owner': self.owner.to_dict() if hasattr(self, 'owner') and self.owner else {'id': self.owner_id},
+            'review_count': self.review_count or 0,
+            'average_rating': self.average_rating,
+            'rating_histogram': self.rating_histogram,
             'amenities': [a.to_dict() if hasattr(a, 'to_dict') else a for a in self.amenities],
             'reviews': [r.to_dict() if hasattr(r, 'to_dict') else r for r in self.reviews]
         }
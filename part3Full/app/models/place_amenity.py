@@ -2,5 +2,7 @@ from app.extensions import db
 
 place_amenity = db.Table('place_amenity',
     db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
-    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True)
+    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True),
+    # The primary key covers place -> amenities, this covers amenity -> places
+    db.Index('ix_place_amenity_amenity_id', 'amenity_id')
 )
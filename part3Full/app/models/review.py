@@ -4,12 +4,26 @@ from app.extensions import db
 
 class Review(BaseModel):
     __tablename__ = 'reviews'
+    # One review per user and place; also serves the exists_for lookup.
+    # Both composites lead with place_id, so no single-column index on it.
+    __table_args__ = (
+        db.Index('ix_reviews_place_id_user_id', 'place_id', 'user_id', unique=True),
+        db.Index('ix_reviews_place_id_created_at', 'place_id', 'created_at'),
+    )
     
     text = db.Column(db.String(500), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
     
     place_id = db.Column(db.String(36), db.ForeignKey('places.id'), nullable=False)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+
+    public_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'rating': ('rating',),
+        'place_id': ('place_id',),
+        'user_id': ('user_id',),
+    }
 
     def __init__(self, text, rating, place, user):
         super().__init__()
@@ -1,4 +1,4 @@
-from app.extensions import db, bcrypt
+from app.extensions import db, password_hasher
 import re
 from app.models.basemodel import BaseModel
 from sqlalchemy.orm import validates, relationship
@@ -12,6 +12,14 @@ class User(BaseModel):
     password = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     
+    # password and is_admin are never exposed
+    public_fields = {
+        'id': ('id',),
+        'first_name': ('first_name',),
+        'last_name': ('last_name',),
+        'email': ('email',),
+    }
+
     places = relationship('Place', backref='owner', lazy=True, cascade='all, delete-orphan')
     reviews = relationship('Review', backref='user', lazy=True, cascade='all, delete-orphan')
 
@@ -63,11 +71,10 @@ class User(BaseModel):
         self.reviews.remove(review)
 
     def hash_password(self, password):
-        self.password = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password = password_hasher.hash(password)
 
     def verify_password(self, password):
-        password_hash = self.password.encode('utf-8') if isinstance(self.password, str) else self.password
-        return bcrypt.check_password_hash(password_hash, password)
+        return password_hasher.verify(self.password, password)
 
     def to_dict(self):
         return {
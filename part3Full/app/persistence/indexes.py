@@ -0,0 +1,48 @@
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+from app.extensions import db
+
+
+def declared_indexes():
+    """Every index declared on the models, in table dependency order"""
+    return [index for table in db.metadata.sorted_tables
+            for index in sorted(table.indexes, key=lambda index: index.name)]
+
+
+def missing_indexes(bind):
+    """
+    Declared indexes absent from tables that already exist
+
+    db.create_all() creates indexes with new tables only, so databases
+    created before an index was declared need it added separately.
+    """
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    existing = {}
+    missing = []
+    for index in declared_indexes():
+        if index.table.name not in tables:
+            continue
+        if index.table.name not in existing:
+            existing[index.table.name] = {found['name'] for found in inspector.get_indexes(index.table.name)}
+        if index.name not in existing[index.table.name]:
+            missing.append(index)
+    return missing
+
+
+def ensure_indexes(bind=None):
+    """
+    Create the missing declared indexes
+
+    Returns (created, failed) lists of (index name, error). A failure, e.g.
+    a unique index over duplicated rows, does not stop the other indexes.
+    """
+    bind = bind or db.engine
+    created, failed = [], []
+    for index in missing_indexes(bind):
+        try:
+            index.create(bind)
+            created.append(index.name)
+        except SQLAlchemyError as e:
+            failed.append((index.name, str(e.orig if hasattr(e, 'orig') else e)))
+    return created, failed
@@ -1,18 +1,32 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from app.persistence.pagination import encode_cursor, decode_cursor
 
 class Repository(ABC):
     @abstractmethod
     def add(self, obj):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
     @abstractmethod
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
 
+    @abstractmethod
+    def get_page(self, limit, after=None):
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -21,10 +35,22 @@ class Repository(ABC):
     def delete(self, obj_id):
         pass
 
+    @abstractmethod
+    def delete_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def count(self):
+        pass
+
+    @abstractmethod
+    def exists(self):
+        pass
+
 
 class InMemoryRepository(Repository):
     def __init__(self):
@@ -33,12 +59,32 @@ class InMemoryRepository(Repository):
     def add(self, obj):
         self._storage[obj.id] = obj
 
+    def add_many(self, objs):
+        for obj in objs:
+            self._storage[obj.id] = obj
+        return objs
+
     def get(self, obj_id):
         return self._storage.get(obj_id)
 
+    def get_many(self, obj_ids):
+        return [self._storage[obj_id] for obj_id in dict.fromkeys(obj_ids) if obj_id in self._storage]
+
     def get_all(self):
         return list(self._storage.values())
 
+    def get_page(self, limit, after=None):
+        objs = sorted(self._storage.values(), key=lambda obj: (obj.created_at, obj.id))
+        if after:
+            created_at, obj_id = decode_cursor(after)
+            key = (datetime.fromisoformat(created_at), obj_id)
+            objs = [obj for obj in objs if (obj.created_at, obj.id) > key]
+        page = objs[:limit]
+        next_cursor = None
+        if len(objs) > limit:
+            next_cursor = encode_cursor([page[-1].created_at, page[-1].id])
+        return page, next_cursor
+
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
@@ -51,12 +97,47 @@ class InMemoryRepository(Repository):
             return True
         return False
 
+    def delete_many(self, obj_ids):
+        deleted = 0
+        for obj_id in dict.fromkeys(obj_ids):
+            if self._storage.pop(obj_id, None) is not None:
+                deleted += 1
+        return deleted
+
     def get_by_attribute(self, attr_name, attr_value):
         return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
 
+    def count(self):
+        return len(self._storage)
+
+    def exists(self):
+        return bool(self._storage)
+
+
+def _as_column_type(attr, value):
+    """Coerce a numeric value read back from the database to its column's Python type"""
+    try:
+        python_type = attr.columns[0].type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (int, float) and isinstance(value, (int, float)) and type(value) is not python_type:
+        return python_type(value)
+    return value
+
 
 class SQLAlchemyRepository(Repository):
-    
+    # Keyset used by get_page: (attribute name, descending) pairs, unique overall
+    page_order = (('created_at', False), ('id', False))
+    # Named loading strategies: profile name -> callable returning loader options
+    load_profiles = {}
+    # Attributes loaded whatever the requested fieldset (keys, timestamps, sort columns)
+    always_load = ('id', 'created_at', 'updated_at')
+    # Attributes whose validators depend on other attributes of the loaded
+    # object: updates touching them go through the ORM instead of RETURNING
+    orm_update_keys = ()
+    # Columns maintained by the application that update() refuses to write
+    protected_fields = ('id', 'created_at', 'updated_at')
+
     def __init__(self, model):
         self.model = model
 
@@ -66,13 +147,179 @@ class SQLAlchemyRepository(Repository):
         db.session.commit()
         return obj
 
-    def get(self, obj_id):
-        return self.model.query.get(obj_id)
+    def add_many(self, objs):
+        """Insert all objects in a single transaction"""
+        from app.extensions import db
+        db.session.add_all(objs)
+        db.session.commit()
+        return objs
 
-    def get_all(self):
-        return self.model.query.all()
+    def get(self, obj_id, profile=None, fields=None):
+        if profile is None and fields is None:
+            return self.model.query.get(obj_id)
+        return self._query(profile, fields).filter(self.model.id == obj_id).first()
+
+    def get_many(self, obj_ids, profile=None):
+        """Fetch every existing object among obj_ids with one IN (...) query"""
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if not obj_ids:
+            return []
+        return self._query(profile).filter(self.model.id.in_(obj_ids)).all()
+
+    def get_all(self, profile=None, fields=None):
+        return self._query(profile, fields).all()
+
+    def iter_all(self, batch_size=1000):
+        """
+        Yield every object in keyset order, batch_size rows at a time
+
+        yield_per streams the result from a server-side cursor instead of
+        buffering the whole table; eager loaders cannot be combined with it,
+        so every relationship is switched to lazy loading.
+        """
+        from sqlalchemy.orm import lazyload
+        query = self._ordered(self.model.query.options(lazyload('*')), self.page_order)
+        yield from query.yield_per(batch_size)
+
+    def get_version(self, **filters):
+        """Return (max updated_at, row count) of the matching rows in one aggregate query"""
+        from app.extensions import db
+        return (db.session.query(db.func.max(self.model.updated_at), db.func.count(self.model.id))
+                .filter_by(**filters).one())
+
+    def _query(self, profile=None, fields=None):
+        """
+        Start a query using the loader options of the given profile
+
+        A fieldset (names from model.public_fields) takes precedence over the
+        profile: only the columns behind those fields are selected and the
+        relationships they do not mention are left unloaded.
+        """
+        if fields is not None:
+            return self.model.query.options(*self._fieldset_options(fields))
+        if profile is None:
+            return self.model.query
+        if profile not in self.load_profiles:
+            raise ValueError(f"Unknown load profile: {profile}")
+        return self.model.query.options(*self.load_profiles[profile]())
+
+    def _fieldset_options(self, fields):
+        from sqlalchemy import inspect
+        from sqlalchemy.orm import joinedload, lazyload, load_only, selectinload
+        mapper = inspect(self.model)
+        needed = set(self.always_load)
+        for field in fields:
+            needed.update(self.model.public_fields[field])
+        options = [load_only(*[getattr(self.model, attr.key) for attr in mapper.column_attrs
+                               if attr.key in needed])]
+        for relationship in mapper.relationships:
+            attribute = getattr(self.model, relationship.key)
+            if relationship.key not in needed:
+                options.append(lazyload(attribute))
+            elif relationship.uselist:
+                options.append(selectinload(attribute))
+            else:
+                options.append(joinedload(attribute))
+        return options
+
+    def get_page(self, limit, after=None, query=None, order=None, profile=None, fields=None):
+        """
+        Return one page of objects and the cursor of the next page
+
+        Rows are ordered by the keyset and the page starts strictly after the
+        row encoded in `after`, so each page costs one indexed range scan
+        whatever its position in the table.
+        """
+        from sqlalchemy import and_, or_
+        order = order or self.page_order
+        query = query if query is not None else self._query(profile, fields)
+        columns = [getattr(self.model, name) for name, _ in order]
+
+        if after:
+            values = self._decode_keyset(after, columns)
+            clauses = []
+            for i, (column, (_, descending)) in enumerate(zip(columns, order)):
+                bound = column < values[i] if descending else column > values[i]
+                clauses.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], bound))
+            query = query.filter(or_(*clauses))
+
+        objs = self._ordered(query, order).limit(limit + 1).all()
+        page = objs[:limit]
+        next_cursor = None
+        if len(objs) > limit:
+            next_cursor = encode_cursor([getattr(page[-1], name) for name, _ in order])
+        return page, next_cursor
+
+    def _ordered(self, query, order):
+        """Apply an ORDER BY built from (attribute name, descending) pairs"""
+        return query.order_by(*[getattr(self.model, name).desc() if descending
+                                else getattr(self.model, name).asc()
+                                for name, descending in order])
+
+    def _decode_keyset(self, cursor, columns):
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise ValueError("Invalid cursor")
+        decoded = []
+        for column, value in zip(columns, values):
+            if value is not None and not isinstance(value, (str, int, float)):
+                raise ValueError("Invalid cursor")
+            if value is not None and column.type.python_type is datetime:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise ValueError("Invalid cursor")
+            decoded.append(value)
+        return decoded
 
     def update(self, obj_id, data):
+        """
+        Apply data to a row and return the updated object
+
+        The model validators run up front on a scratch instance, then a single
+        UPDATE ... RETURNING writes the row and reads it back. Engines without
+        UPDATE ... RETURNING, and data touching relationships or
+        orm_update_keys, take the load / modify / commit / refresh path.
+        """
+        from app.extensions import db
+        from sqlalchemy import inspect
+        from sqlalchemy.orm.attributes import set_committed_value
+        from datetime import datetime, timezone
+        mapper = inspect(self.model)
+        protected = [key for key in data if key in self.protected_fields]
+        if protected:
+            raise ValueError(f"Cannot update: {', '.join(protected)}")
+        data = {key: value for key, value in data.items() if hasattr(self.model, key)}
+        if (not db.session.get_bind().dialect.update_returning
+                or any(key not in mapper.column_attrs or key in self.orm_update_keys for key in data)):
+            return self._update_loaded(obj_id, data)
+
+        scratch = self.model._sa_class_manager.new_instance()
+        values = {}
+        for key, value in data.items():
+            setattr(scratch, key, value)
+            values[key] = getattr(scratch, key)
+        # Naive UTC, as the DateTime column hands it back on the next load
+        values['updated_at'] = datetime.now(timezone.utc).replace(tzinfo=None)
+
+        statement = (db.update(self.model).where(self.model.id == obj_id)
+                     .values(**values).returning(self.model))
+        obj = db.session.execute(statement, execution_options={'populate_existing': True}).scalars().first()
+        if obj is None:
+            db.session.rollback()
+            return None
+        # SQLite hands back REAL values as ints (1.0 -> 1) through RETURNING,
+        # whether or not the column was set: bring every one back to its type
+        columns = dict({attr.key: _as_column_type(attr, getattr(obj, attr.key))
+                        for attr in mapper.column_attrs}, **values)
+        db.session.commit()
+        # The commit expired the row we just read back: restore it rather
+        # than paying for another SELECT on the next attribute access
+        for key, value in columns.items():
+            set_committed_value(obj, key, value)
+        return obj
+
+    def _update_loaded(self, obj_id, data):
         from app.extensions import db
         from datetime import datetime, timezone
         obj = self.get(obj_id)
@@ -98,5 +345,31 @@ class SQLAlchemyRepository(Repository):
             return True
         return False
 
+    def delete_many(self, obj_ids):
+        """
+        Delete every object among obj_ids with a single DELETE statement
+
+        ORM relationship cascades are not applied: repositories whose model
+        owns dependent rows must remove them first (see PlaceRepository).
+        Returns the number of deleted rows.
+        """
+        from app.extensions import db
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if not obj_ids:
+            return 0
+        deleted = self.model.query.filter(self.model.id.in_(obj_ids)).delete()
+        db.session.commit()
+        return deleted
+
     def get_by_attribute(self, attr_name, attr_value):
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
+
+    def count(self):
+        """Number of rows, counted by the database"""
+        from app.extensions import db
+        return db.session.query(db.func.count(self.model.id)).scalar()
+
+    def exists(self):
+        """Whether the table has any row: SELECT 1 ... LIMIT 1 instead of loading it"""
+        from app.extensions import db
+        return db.session.query(db.literal(1)).select_from(self.model).limit(1).first() is not None
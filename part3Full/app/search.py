@@ -0,0 +1,420 @@
+import re
+import threading
+from abc import ABC, abstractmethod
+
+# Relative weight of each searchable field in the ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 3.0
+REVIEWS_WEIGHT = 1.0
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a free-text query into the words it searches for"""
+    return _TOKEN.findall(query or '')[:16]
+
+
+class SearchBackend(ABC):
+    """Full-text index of the places, their titles, descriptions and review text"""
+
+    @abstractmethod
+    def ensure_indexes(self):
+        """Create the tables or indexes the backend needs, returns (created, failed)"""
+        pass
+
+    @abstractmethod
+    def index_places(self, place_ids):
+        """(Re)index the title and description of the given places, dropping deleted ones"""
+        pass
+
+    @abstractmethod
+    def index_reviews(self, review_ids):
+        """(Re)index the text of the given reviews, dropping deleted ones"""
+        pass
+
+    @abstractmethod
+    def rebuild(self):
+        """Reindex every place, returns the number of places indexed"""
+        pass
+
+    @abstractmethod
+    def search(self, query, limit, offset=0):
+        """Return up to limit (place_id, score) pairs, best match first"""
+        pass
+
+
+class Fts5Backend(SearchBackend):
+    """
+    SQLite FTS5 index ranked with bm25
+
+    Every place has one row of the place_search virtual table for its title
+    and description, and every review one row for its text, so a write only
+    rewrites the rows of what it changed. place_search_docs maps the integer
+    rowids to the place (or review) they index. Both tables are created by
+    `flask ensure-indexes`, or else by the first transaction that needs
+    them, and filled from the places and reviews tables, so existing
+    databases need no migration.
+    """
+
+    def __init__(self):
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        """Create and fill the tables when missing, returns True when it did"""
+        if self._ready:
+            return False
+        from app.extensions import db
+        with self._lock:
+            if self._ready:
+                return False
+            exists = db.session.execute(db.text(
+                "SELECT 1 FROM sqlite_master WHERE name = 'place_search_docs'")).first()
+            if not exists:
+                # One document per place, before reviews got rows of their own
+                db.session.execute(db.text("DROP TABLE IF EXISTS place_search"))
+                db.session.execute(db.text("DROP TABLE IF EXISTS place_search_ids"))
+                db.session.execute(db.text(
+                    "CREATE TABLE place_search_docs ("
+                    "docid INTEGER PRIMARY KEY, doc_key VARCHAR(36) NOT NULL UNIQUE, "
+                    "place_id VARCHAR(36) NOT NULL)"))
+                db.session.execute(db.text(
+                    "CREATE INDEX ix_place_search_docs_place_id ON place_search_docs (place_id)"))
+                db.session.execute(db.text(
+                    "CREATE VIRTUAL TABLE place_search USING fts5("
+                    "title, description, reviews, tokenize='unicode61 remove_diacritics 2')"))
+                self._index_all()
+            self._ready = True
+            return not exists
+
+    def ensure_indexes(self):
+        from app.extensions import db
+        if not self._ensure():
+            return [], []
+        db.session.commit()
+        return ['place_search'], []
+
+    def index_places(self, place_ids):
+        self._ensure()
+        self._index_places(list(dict.fromkeys(place_ids)))
+
+    def index_reviews(self, review_ids):
+        self._ensure()
+        self._index_reviews(list(dict.fromkeys(review_ids)))
+
+    def rebuild(self):
+        from app.extensions import db
+        self._ensure()
+        db.session.execute(db.text("DELETE FROM place_search"))
+        db.session.execute(db.text("DELETE FROM place_search_docs"))
+        indexed = self._index_all()
+        db.session.commit()
+        return indexed
+
+    def search(self, query, limit, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        from app.extensions import db
+        if self._ensure():
+            db.session.commit()
+        # A place matches when every word is in one of its rows, the last one
+        # also as a prefix; its score adds up the bm25 of those rows
+        matches = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+        # (bm25 only works in a query of its own over the FTS table: the
+        # LIMIT -1 keeps SQLite from flattening it into the outer query)
+        per_word = ' UNION ALL '.join(
+            f"SELECT docs.place_id, {word} AS word, hits.score FROM ("
+            "SELECT rowid AS docid, bm25(place_search, :title, :description, :reviews) AS score "
+            f"FROM place_search WHERE place_search MATCH :match_{word} LIMIT -1"
+            ") AS hits JOIN place_search_docs AS docs ON docs.docid = hits.docid"
+            for word in range(len(matches)))
+        rows = db.session.execute(db.text(
+            f"SELECT place_id, SUM(score) AS score FROM ({per_word}) AS matches "
+            "GROUP BY place_id HAVING COUNT(DISTINCT word) = :words "
+            "ORDER BY score, place_id LIMIT :limit OFFSET :offset"),
+            dict({f'match_{word}': match for word, match in enumerate(matches)},
+                 title=TITLE_WEIGHT, description=DESCRIPTION_WEIGHT, reviews=REVIEWS_WEIGHT,
+                 words=len(matches), limit=limit, offset=offset))
+        # bm25 is negative, lower is better
+        return [(place_id, -score) for place_id, score in rows]
+
+    def _index_all(self, batch_size=1000):
+        from app.models.place import Place
+        from app.models.review import Review
+        indexed = 0
+        for place_ids in self._batches(Place.id, batch_size):
+            self._index_places(place_ids)
+            indexed += len(place_ids)
+        for review_ids in self._batches(Review.id, batch_size):
+            self._index_reviews(review_ids)
+        return indexed
+
+    def _batches(self, column, batch_size):
+        from app.extensions import db
+        last_id = ''
+        while True:
+            ids = [row_id for (row_id,) in db.session.query(column)
+                   .filter(column > last_id).order_by(column).limit(batch_size)]
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
+    def _index_places(self, place_ids):
+        if not place_ids:
+            return
+        from app.extensions import db
+        from app.models.place import Place
+        documents = {place_id: (title, description) for place_id, title, description
+                     in db.session.query(Place.id, Place.title, Place.description)
+                     .filter(Place.id.in_(place_ids))}
+        # A deleted place takes the rows of its reviews along
+        self._drop('place_id', [place_id for place_id in place_ids if place_id not in documents])
+        self._write([(place_id, place_id, title, description or '', '')
+                     for place_id, (title, description) in documents.items()])
+
+    def _index_reviews(self, review_ids):
+        if not review_ids:
+            return
+        from app.extensions import db
+        from app.models.review import Review
+        documents = {review_id: (place_id, text) for review_id, place_id, text
+                     in db.session.query(Review.id, Review.place_id, Review.text)
+                     .filter(Review.id.in_(review_ids))}
+        self._drop('doc_key', [review_id for review_id in review_ids if review_id not in documents])
+        self._write([(review_id, place_id, '', '', text or '')
+                     for review_id, (place_id, text) in documents.items()])
+
+    def _write(self, documents):
+        """Insert or replace the (doc_key, place_id, title, description, reviews) rows"""
+        if not documents:
+            return
+        from app.extensions import db
+        db.session.execute(db.text("INSERT OR IGNORE INTO place_search_docs (doc_key, place_id) "
+                                   "VALUES (:doc_key, :place_id)"),
+                           [{'doc_key': doc_key, 'place_id': place_id} for doc_key, place_id, *_ in documents])
+        docids = dict(db.session.execute(
+            db.text("SELECT doc_key, docid FROM place_search_docs WHERE doc_key IN :keys")
+            .bindparams(db.bindparam('keys', expanding=True)),
+            {'keys': [doc_key for doc_key, *_ in documents]}).all())
+        db.session.execute(db.text("DELETE FROM place_search WHERE rowid = :docid"),
+                           [{'docid': docid} for docid in docids.values()])
+        db.session.execute(
+            db.text("INSERT INTO place_search (rowid, title, description, reviews) "
+                    "VALUES (:docid, :title, :description, :reviews)"),
+            [{'docid': docids[doc_key], 'title': title, 'description': description, 'reviews': reviews}
+             for doc_key, _, title, description, reviews in documents])
+
+    def _drop(self, column, values):
+        """Delete the rows whose place_search_docs column is one of values"""
+        if not values:
+            return
+        from app.extensions import db
+        params = {'values': values}
+        docs = f"SELECT docid FROM place_search_docs WHERE {column} IN :values"
+        db.session.execute(db.text(f"DELETE FROM place_search WHERE rowid IN ({docs})")
+                           .bindparams(db.bindparam('values', expanding=True)), params)
+        db.session.execute(db.text(f"DELETE FROM place_search_docs WHERE {column} IN :values")
+                           .bindparams(db.bindparam('values', expanding=True)), params)
+
+
+class FullTextBackend(SearchBackend):
+    """
+    MySQL FULLTEXT indexes on places and reviews
+
+    InnoDB keeps FULLTEXT indexes up to date on every write, so there is
+    nothing to sync. The indexes are added by `flask ensure-indexes`, never
+    from a request: the ALTER TABLE rebuilds the table and commits.
+    """
+
+    INDEXES = (
+        ('places', 'ft_places_title', ('title',)),
+        ('places', 'ft_places_title_description', ('title', 'description')),
+        ('reviews', 'ft_reviews_text', ('text',)),
+    )
+
+    def ensure_indexes(self):
+        from sqlalchemy import inspect
+        from sqlalchemy.exc import SQLAlchemyError
+        from app.extensions import db
+        inspector = inspect(db.engine)
+        created, failed = [], []
+        for table, name, columns in self.INDEXES:
+            if name in {index['name'] for index in inspector.get_indexes(table)}:
+                continue
+            try:
+                db.session.execute(db.text(
+                    f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({', '.join(columns)})"))
+                db.session.commit()
+                created.append(name)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                failed.append((name, str(e.orig if hasattr(e, 'orig') else e)))
+        return created, failed
+
+    def index_places(self, place_ids):
+        pass
+
+    def index_reviews(self, review_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, query, limit, offset=0):
+        query = ' '.join(tokenize(query))
+        if not query:
+            return []
+        from app.extensions import db
+        rows = db.session.execute(db.text(
+            "SELECT id, SUM(score) AS score FROM ("
+            " SELECT id, :title * MATCH (title) AGAINST (:q)"
+            " + :description * MATCH (title, description) AGAINST (:q) AS score"
+            " FROM places WHERE MATCH (title, description) AGAINST (:q)"
+            " UNION ALL"
+            " SELECT place_id, :reviews * MATCH (text) AGAINST (:q)"
+            " FROM reviews WHERE MATCH (text) AGAINST (:q)"
+            ") AS matches GROUP BY id ORDER BY score DESC, id LIMIT :limit OFFSET :offset"),
+            {'q': query, 'title': TITLE_WEIGHT, 'description': DESCRIPTION_WEIGHT,
+             'reviews': REVIEWS_WEIGHT, 'limit': limit, 'offset': offset})
+        return [(place_id, float(score)) for place_id, score in rows]
+
+
+class LikeBackend(SearchBackend):
+    """Fallback for other databases: LIKE scans, ranked by where the words match"""
+
+    def ensure_indexes(self):
+        return [], []
+
+    def index_places(self, place_ids):
+        pass
+
+    def index_reviews(self, review_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, query, limit, offset=0):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        from app.extensions import db
+        from app.models.place import Place
+        from app.models.review import Review
+
+        conditions, score = [], 0
+        for token in tokens:
+            pattern = f'%{token}%'
+            in_reviews = (db.session.query(Review.id)
+                          .filter(Review.place_id == Place.id, Review.text.ilike(pattern))
+                          .exists())
+            conditions.append(db.or_(Place.title.ilike(pattern), Place.description.ilike(pattern), in_reviews))
+            score = (score
+                     + db.case((Place.title.ilike(pattern), TITLE_WEIGHT), else_=0)
+                     + db.case((Place.description.ilike(pattern), DESCRIPTION_WEIGHT), else_=0)
+                     + db.case((in_reviews, REVIEWS_WEIGHT), else_=0))
+        score = score.label('score')
+        rows = (db.session.query(Place.id, score)
+                .filter(*conditions)
+                .order_by(score.desc(), Place.id)
+                .limit(limit).offset(offset))
+        return [(place_id, float(value)) for place_id, value in rows]
+
+
+BACKENDS = {
+    'fts5': Fts5Backend,
+    'fulltext': FullTextBackend,
+    'like': LikeBackend,
+}
+
+
+class SearchIndex:
+    """
+    Entry point of the text search, the facade keeps it in sync
+
+    SEARCH_BACKEND picks the implementation: 'fts5' (SQLite), 'fulltext'
+    (MySQL), 'like', or 'auto' to choose from the database dialect when
+    the index is first used. The facade tracks the places and reviews a
+    write touches before the repository commits; their rows are rewritten
+    in that same transaction, just before it commits, or forgotten if it
+    rolls back.
+    """
+
+    def __init__(self, app=None):
+        self.backend_name = 'auto'
+        self._backend = None
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend_name = app.config.get('SEARCH_BACKEND', self.backend_name)
+        if self.backend_name != 'auto' and self.backend_name not in BACKENDS:
+            raise ValueError(f"SEARCH_BACKEND must be 'auto' or one of: {', '.join(BACKENDS)}")
+        self._backend = None
+        if not self._listening:
+            from sqlalchemy import event
+            from app.extensions import db
+            event.listen(db.session, 'before_commit', self._before_commit)
+            event.listen(db.session, 'after_soft_rollback', self._after_rollback)
+            self._listening = True
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            name = self.backend_name
+            if name == 'auto':
+                from app.extensions import db
+                name = {'sqlite': 'fts5', 'mysql': 'fulltext'}.get(db.engine.dialect.name, 'like')
+            self._backend = BACKENDS[name]()
+        return self._backend
+
+    def track(self, *places):
+        """Reindex these places (objects or ids) when the current transaction commits"""
+        self._pending()['places'].extend(places)
+
+    def track_reviews(self, *reviews):
+        """Reindex these reviews (objects or ids) when the current transaction commits"""
+        self._pending()['reviews'].extend(reviews)
+
+    def ensure_indexes(self):
+        return self.backend.ensure_indexes()
+
+    def index_places(self, place_ids):
+        self.backend.index_places(place_ids)
+
+    def index_reviews(self, review_ids):
+        self.backend.index_reviews(review_ids)
+
+    def rebuild(self):
+        return self.backend.rebuild()
+
+    def search(self, query, limit, offset=0):
+        return self.backend.search(query, limit, offset)
+
+    def _pending(self):
+        from app.extensions import db
+        session = db.session()
+        # The pending rows belong to the transaction, start it if need be
+        if not session.in_transaction():
+            session.begin()
+        return session.info.setdefault('search_pending', {'places': [], 'reviews': []})
+
+    def _before_commit(self, session):
+        pending = session.info.pop('search_pending', None)
+        if not pending:
+            return
+        # New places and reviews only get their id when flushed
+        session.flush()
+        self.index_places([place if isinstance(place, str) else place.id for place in pending['places']])
+        self.index_reviews([review if isinstance(review, str) else review.id for review in pending['reviews']])
+
+    def _after_rollback(self, session, previous_transaction):
+        if previous_transaction.nested:
+            return
+        session.info.pop('search_pending', None)
+        # Search tables created in the rolled back transaction are gone too
+        self._backend = None
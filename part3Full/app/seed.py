@@ -0,0 +1,70 @@
+from app.extensions import db
+
+TEST_USER = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "email": "john2.doe@example.com",
+    "password": "123456",
+    "is_admin": True
+}
+
+TEST_AMENITIES = ["WiFi", "Swimming Pool", "Parking", "Air Conditioning", "Kitchen", "TV"]
+
+TEST_PLACES = [
+    ({
+        "title": "Luxury Villa",
+        "description": "Beautiful villa with ocean view and private pool",
+        "price": 150.0,
+        "latitude": 48.8566,
+        "longitude": 2.3522
+    }, ["Swimming Pool", "Air Conditioning", "TV", "WiFi"]),
+    ({
+        "title": "Beach House",
+        "description": "Cozy beach house steps from the ocean",
+        "price": 200.0,
+        "latitude": 43.6047,
+        "longitude": 1.4442
+    }, ["WiFi", "Parking", "Kitchen"]),
+    ({
+        "title": "Mountain Cabin",
+        "description": "Rustic cabin in the mountains",
+        "price": 80.0,
+        "latitude": 45.7640,
+        "longitude": 4.8357
+    }, ["WiFi", "Parking", "Kitchen", "Air Conditioning"]),
+]
+
+
+def seed_database():
+    """
+    Create the tables and the test user, amenities and places
+
+    Idempotent: the user is looked up by email, only missing amenities are
+    created and places are only added to an empty table. Run it through
+    `flask seed`, or at startup when AUTO_SEED is enabled.
+    """
+    from app.extensions import search_index
+    from app.services.facade_instance import facade
+    from app.models.amenity import Amenity
+    from app.models.place import Place
+
+    db.create_all()
+    search_index.ensure_indexes()
+
+    user = facade.get_user_by_email(TEST_USER["email"])
+    if not user:
+        user = facade.create_user(dict(TEST_USER))
+        print("Test user created")
+
+    existing = {name for (name,) in db.session.query(Amenity.name).filter(Amenity.name.in_(TEST_AMENITIES))}
+    missing = [name for name in TEST_AMENITIES if name not in existing]
+    if missing:
+        facade.create_amenities([{"name": name} for name in missing])
+        print(f"Test amenities created: {len(missing)} amenities")
+
+    if db.session.query(Place.id).first() is None:
+        amenity_ids = dict(db.session.query(Amenity.name, Amenity.id).filter(Amenity.name.in_(TEST_AMENITIES)))
+        for place_data, amenity_names in TEST_PLACES:
+            facade.create_place(dict(place_data, owner_id=user.id,
+                                     amenities=[amenity_ids[name] for name in amenity_names]))
+        print("Test places created with amenities")
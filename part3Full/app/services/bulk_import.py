@@ -0,0 +1,293 @@
+import csv
+import json
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from sqlalchemy.exc import SQLAlchemyError
+from app.extensions import db, password_hasher, search_index
+from app.hashing import PasswordHasherBusy
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.place_amenity import place_amenity
+from app.models.review import Review
+from app.models.user import User
+
+IMPORT_KINDS = ('users', 'amenities', 'places', 'reviews')
+RATING_COLUMNS = ('review_count', 'rating_sum') + tuple(f'rating_{rating}_count' for rating in range(1, 6))
+
+# Value types of CSV columns, everything else is kept as text
+_CSV_TYPES = {
+    'price': float,
+    'latitude': float,
+    'longitude': float,
+    'rating': int,
+    'is_admin': lambda value: value.strip().lower() in ('1', 'true', 'yes'),
+    'amenities': lambda value: [item for item in value.split(';') if item],
+}
+
+
+class RowError(ValueError):
+    """A row that cannot be imported"""
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) from an NDJSON or CSV text stream"""
+    if fmt == 'ndjson':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f"Invalid JSON: {e}")
+                continue
+            yield line_number, row if isinstance(row, dict) else RowError("Row must be a JSON object")
+    elif fmt == 'csv':
+        for line_number, row in enumerate(csv.DictReader(stream), 2):
+            try:
+                yield line_number, {key: _CSV_TYPES[key](value) if key in _CSV_TYPES else value
+                                    for key, value in row.items() if value not in (None, '')}
+            except ValueError as e:
+                yield line_number, RowError(f"Invalid value: {e}")
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+class ImportReport:
+    """Counts, timing and per-row errors of an import run"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.imported = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def fail(self, line_number, message):
+        self.errors.append({'line': line_number, 'error': str(message)})
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+
+class BulkImporter:
+    """
+    Import users, amenities, places and reviews in large chunks
+
+    Each row is checked by the model validators on a scratch instance that
+    never enters the session, references (owners, places, amenities) are
+    resolved with one IN query per chunk, passwords are hashed in parallel
+    on the password hasher pool, and every chunk is written with executemany
+    INSERTs in a single transaction. Rows that fail are reported with their
+    line number and skipped; the rest of the chunk is still imported. The
+    search documents of the places a chunk touches are refreshed in the
+    same transaction.
+    """
+
+    def __init__(self, chunk_size=5000, on_chunk=None):
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+
+    def run(self, kind, rows):
+        """Import (line number, row) pairs of the given kind and return an ImportReport"""
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(IMPORT_KINDS)}")
+        prepare = getattr(self, f'_prepare_{kind}')
+        report = ImportReport(kind)
+        chunk = []
+        for line_number, row in rows:
+            if isinstance(row, RowError):
+                report.fail(line_number, row)
+                continue
+            chunk.append((line_number, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(prepare, chunk, report)
+                chunk = []
+        if chunk:
+            self._import_chunk(prepare, chunk, report)
+        return report
+
+    def _import_chunk(self, prepare, chunk, report):
+        try:
+            accepted = prepare(chunk, report)
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            for line_number, _ in chunk:
+                report.fail(line_number, f"Chunk rejected by the database: {e.__class__.__name__}")
+        except PasswordHasherBusy as e:
+            db.session.rollback()
+            for line_number, _ in chunk:
+                report.fail(line_number, f"Chunk rejected: {e}")
+        else:
+            report.imported += accepted
+        if self.on_chunk:
+            self.on_chunk(report)
+
+    def _prepare_users(self, chunk, report):
+        emails = [row.get('email') for _, row in chunk]
+        taken = {email for (email,) in db.session.query(User.email).filter(User.email.in_(emails))}
+        values, passwords = [], []
+        for line_number, row in chunk:
+            try:
+                user = _validated(User, row, ('first_name', 'last_name', 'email'),
+                                  optional=('is_admin',))
+                if user['email'] in taken:
+                    raise RowError(f"Email already registered: {user['email']}")
+                if row.get('password_hash'):
+                    if not str(row['password_hash']).startswith('$2'):
+                        raise RowError("password_hash must be a bcrypt hash")
+                    user['password'] = row['password_hash']
+                elif row.get('password'):
+                    passwords.append((len(values), row['password']))
+                else:
+                    raise RowError("password is required")
+            except (RowError, TypeError, ValueError) as e:
+                report.fail(line_number, e)
+                continue
+            taken.add(user['email'])
+            if user['is_admin'] is None:
+                user['is_admin'] = False
+            values.append(_with_defaults(user, row))
+
+        hashes = password_hasher.hash_many([password for _, password in passwords])
+        for (index, _), password_hash in zip(passwords, hashes):
+            values[index]['password'] = password_hash
+        return _insert(User.__table__, values)
+
+    def _prepare_amenities(self, chunk, report):
+        highest = db.session.query(db.func.max(Amenity.bit)).scalar()
+        next_bit = 0 if highest is None else highest + 1
+        values = []
+        for line_number, row in chunk:
+            try:
+                amenity = _validated(Amenity, row, ('name',))
+            except (RowError, TypeError, ValueError) as e:
+                report.fail(line_number, e)
+                continue
+            amenity['bit'] = next_bit if next_bit < Amenity.MAX_BITS else None
+            if amenity['bit'] is not None:
+                next_bit += 1
+            values.append(_with_defaults(amenity, row))
+        return _insert(Amenity.__table__, values)
+
+    def _prepare_places(self, chunk, report):
+        owners = _existing_ids(User, [row.get('owner_id') for _, row in chunk])
+        amenity_ids = {amenity_id for _, row in chunk for amenity_id in row.get('amenities') or []}
+        bits = dict(db.session.query(Amenity.id, Amenity.bit).filter(Amenity.id.in_(amenity_ids)))
+        values, links = [], []
+        for line_number, row in chunk:
+            try:
+                place = _validated(Place, row, ('title', 'price', 'latitude', 'longitude'),
+                                   optional=('description',), derived=('geohash',))
+                if row.get('owner_id') not in owners:
+                    raise RowError(f"Owner not found: {row.get('owner_id')}")
+                missing = [a for a in row.get('amenities') or [] if a not in bits]
+                if missing:
+                    raise RowError(f"Amenities not found: {', '.join(missing)}")
+            except (RowError, TypeError, ValueError) as e:
+                report.fail(line_number, e)
+                continue
+            place = _with_defaults(place, row)
+            place['owner_id'] = row['owner_id']
+            place['amenity_mask'] = 0
+            for amenity_id in dict.fromkeys(row.get('amenities') or []):
+                if bits[amenity_id] is not None:
+                    place['amenity_mask'] |= 1 << bits[amenity_id]
+                links.append({'place_id': place['id'], 'amenity_id': amenity_id})
+            place.update(dict.fromkeys(RATING_COLUMNS, 0))
+            values.append(place)
+        imported = _insert(Place.__table__, values)
+        _insert(place_amenity, links)
+        search_index.index_places([place['id'] for place in values])
+        return imported
+
+    def _prepare_reviews(self, chunk, report):
+        places = _existing_ids(Place, [row.get('place_id') for _, row in chunk])
+        users = _existing_ids(User, [row.get('user_id') for _, row in chunk])
+        pairs = {(row.get('place_id'), row.get('user_id')) for _, row in chunk}
+        reviewed = set(db.session.query(Review.place_id, Review.user_id)
+                       .filter(db.tuple_(Review.place_id, Review.user_id).in_(pairs)))
+        values = []
+        deltas = {}
+        for line_number, row in chunk:
+            try:
+                review = _validated(Review, row, ('text', 'rating'))
+                if row.get('place_id') not in places:
+                    raise RowError(f"Place not found: {row.get('place_id')}")
+                if row.get('user_id') not in users:
+                    raise RowError(f"User not found: {row.get('user_id')}")
+                if (row['place_id'], row['user_id']) in reviewed:
+                    raise RowError("User already reviewed this place")
+            except (RowError, TypeError, ValueError) as e:
+                report.fail(line_number, e)
+                continue
+            reviewed.add((row['place_id'], row['user_id']))
+            review = _with_defaults(review, row)
+            review['place_id'] = row['place_id']
+            review['user_id'] = row['user_id']
+            values.append(review)
+            delta = deltas.setdefault(row['place_id'], Counter())
+            delta['review_count'] += 1
+            delta['rating_sum'] += review['rating']
+            delta[f"rating_{review['rating']}_count"] += 1
+        imported = _insert(Review.__table__, values)
+
+        # Keep the rating aggregates of Place in step, one executemany UPDATE
+        places_table = Place.__table__
+        if deltas:
+            db.session.execute(
+                places_table.update()
+                .where(places_table.c.id == db.bindparam('place_id'))
+                .values({column: places_table.c[column] + db.bindparam(f'delta_{column}')
+                         for column in RATING_COLUMNS}),
+                [dict({'place_id': place_id},
+                      **{f'delta_{column}': delta[column] for column in RATING_COLUMNS})
+                 for place_id, delta in deltas.items()])
+            search_index.index_reviews([review['id'] for review in values])
+        return imported
+
+
+def _validated(model, row, required, optional=(), derived=()):
+    """Run the model validators over a row and return the cleaned column values"""
+    obj = model._sa_class_manager.new_instance()
+    values = {}
+    for key in required + optional:
+        if row.get(key) is None:
+            if key in required:
+                raise RowError(f"{key} is required")
+            values[key] = None
+            continue
+        setattr(obj, key, row[key])
+        values[key] = getattr(obj, key)
+    for key in derived:
+        values[key] = getattr(obj, key)
+    return values
+
+
+def _with_defaults(values, row):
+    now = datetime.now(timezone.utc)
+    values['id'] = str(row.get('id') or uuid.uuid4())
+    values['created_at'] = now
+    values['updated_at'] = now
+    return values
+
+
+def _existing_ids(model, ids):
+    ids = {obj_id for obj_id in ids if obj_id}
+    if not ids:
+        return set()
+    return {obj_id for (obj_id,) in db.session.query(model.id).filter(model.id.in_(ids))}
+
+
+def _insert(table, values):
+    """executemany INSERT of rows that all carry the same keys"""
+    if not values:
+        return 0
+    db.session.execute(table.insert(), values)
+    return len(values)
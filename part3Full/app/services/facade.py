@@ -6,7 +6,10 @@ from app.services.repositories.amenity_repository import AmenityRepository
 from app.services.repositories.user_repository import UserRepository
 from app.services.repositories.place_repository import PlaceRepository
 from app.services.repositories.review_repository import ReviewRepository
-from app.extensions import db
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db, response_cache, row_counters, search_index, title_index
+from app import instrumentation
+from flask import g, has_request_context
 
 class HBnBFacade:
     def __init__(self):
@@ -14,84 +17,247 @@ class HBnBFacade:
         self.amenity_repo = AmenityRepository()
         self.place_repo = PlaceRepository()
         self.review_repo = ReviewRepository()
+        # Once a user exists, stop asking the database until a caller
+        # rechecks (the tables may have been dropped since)
+        self._has_users = False
+
+    # REQUEST-SCOPED IDENTITY MAP
+    def _identity_map(self):
+        """Objects already fetched during this request, stored on g and dropped with it"""
+        if not has_request_context():
+            return None
+        if 'facade_identity_map' not in g:
+            g.facade_identity_map = {}
+        return g.facade_identity_map
+
+    def _get_cached(self, kind, obj_id, load):
+        identity_map = self._identity_map()
+        if identity_map is None:
+            return load()
+        key = (kind, obj_id)
+        if key in identity_map:
+            instrumentation.count_identity_map_hit()
+            return identity_map[key]
+        obj = load()
+        if obj is not None:
+            identity_map[key] = obj
+        return obj
+
+    def _forget(self, kind, obj_id):
+        identity_map = self._identity_map()
+        if identity_map is not None:
+            identity_map.pop((kind, obj_id), None)
 
     # USER
     def create_user(self, user_data):
         user = User(**user_data)
         self.user_repo.add(user)
+        self._has_users = True
+        row_counters.adjust('users', 1)
         return user
     
-    def get_users(self):
-        return self.user_repo.get_all()
+    def has_users(self, recheck=False):
+        """Whether any user exists, i.e. the first-user bootstrap is over"""
+        if recheck or not self._has_users:
+            self._has_users = self.user_repo.exists()
+        return self._has_users
+
+    def get_users(self, fields=None):
+        return self.user_repo.get_all(fields=fields)
+
+    def get_users_page(self, limit, after=None, fields=None):
+        return self.user_repo.get_page(limit, after, fields=fields)
 
-    def get_user(self, user_id):
-        return self.user_repo.get(user_id)
+    def iter_users(self, batch_size=1000):
+        return self.user_repo.iter_all(batch_size)
+
+    def count_users(self, exact=False):
+        return row_counters.get('users', self.user_repo.count, exact)
+
+    def get_users_version(self):
+        return self.user_repo.get_version()
+
+    def get_user(self, user_id, fields=None):
+        if fields is not None:
+            return self.user_repo.get(user_id, fields=fields)
+        return self._get_cached('user', user_id, lambda: self.user_repo.get(user_id))
 
     def get_user_by_email(self, email):
         return self.user_repo.get_user_by_email(email)
     
     def update_user(self, user_id, user_data):
-        self.user_repo.update(user_id, user_data)
+        self._forget('user', user_id)
+        user = self.user_repo.update(user_id, user_data)
+        # Place detail pages embed their owner
+        response_cache.invalidate('users')
+        return user
     
     # AMENITY
     def create_amenity(self, amenity_data):
         amenity = Amenity(**amenity_data)
         self.amenity_repo.add(amenity)
+        row_counters.adjust('amenities', 1)
+        response_cache.invalidate('amenities')
         return amenity
 
+    def create_amenities(self, amenities_data):
+        """Create several amenities in one transaction"""
+        amenities = [Amenity(**amenity_data) for amenity_data in amenities_data]
+        self.amenity_repo.add_many(amenities)
+        row_counters.adjust('amenities', len(amenities))
+        response_cache.invalidate('amenities')
+        return amenities
+
     def get_amenity(self, amenity_id):
-        return self.amenity_repo.get(amenity_id)
+        return self._get_cached('amenity', amenity_id, lambda: self.amenity_repo.get(amenity_id))
 
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, after=None):
+        return self.amenity_repo.get_page(limit, after)
+
+    def iter_amenities(self, batch_size=1000):
+        return self.amenity_repo.iter_all(batch_size)
+
+    def count_amenities(self, exact=False):
+        return row_counters.get('amenities', self.amenity_repo.count, exact)
+
+    def get_amenities_version(self):
+        return self.amenity_repo.get_version()
+
     def update_amenity(self, amenity_id, amenity_data):
-        self.amenity_repo.update(amenity_id, amenity_data)
+        self._forget('amenity', amenity_id)
+        amenity = self.amenity_repo.update(amenity_id, amenity_data)
+        response_cache.invalidate('amenities')
+        return amenity
 
     # PLACE
     def create_place(self, place_data):
         owner_id = place_data.get('owner_id')
-        user = self.user_repo.get(place_data['owner_id'])
+        user = self.get_user(place_data['owner_id'])
         if not user:
             raise ValueError('Owner not found')
         
-        amenity_ids = place_data.pop('amenities', [])
+        amenity_ids = self._amenity_ids(place_data.pop('amenities', []))
+        amenities = self.amenity_repo.get_many(amenity_ids)
 
         place_data['owner'] = user
         del place_data['owner_id']
         place = Place(**place_data)
-
-        if amenity_ids:
-            for amenity_id in amenity_ids:
-                if isinstance(amenity_id, dict):
-                    amenity_id = amenity_id.get('id')
-                
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity:
-                    place.amenities.append(amenity)
+        place.amenities.extend(amenities)
         
+        # Its search document is written by the same commit
+        search_index.track(place)
         self.place_repo.add(place)
+        title_index.add(place.id, place.title)
+        row_counters.adjust('places', 1)
+        response_cache.invalidate('places')
         return place
 
-    def get_place(self, place_id):
-        return self.place_repo.get(place_id)
+    @staticmethod
+    def _amenity_ids(amenities):
+        """Amenity ids out of a payload of ids or {'id': ...} objects"""
+        amenity_ids = [a.get('id') if isinstance(a, dict) else a for a in amenities or []]
+        if not all(isinstance(amenity_id, str) for amenity_id in amenity_ids):
+            raise ValueError('Amenity ids must be strings')
+        return amenity_ids
+
+    def add_amenities_to_place(self, place, amenities):
+        amenity_ids = self._amenity_ids(amenities)
+        amenities = self.amenity_repo.get_many(amenity_ids)
+        if len(amenities) != len(set(amenity_ids)):
+            raise ValueError('Amenity not found')
+        for amenity in amenities:
+            if amenity not in place.amenities:
+                place.add_amenity(amenity)
+        db.session.commit()
+        row_counters.invalidate_filtered('places')
+        response_cache.invalidate('places', f'place:{place.id}')
+        return place
+
+    def get_place(self, place_id, profile=None, fields=None):
+        if fields is not None:
+            return self.place_repo.get(place_id, fields=fields)
+        if profile is not None:
+            # Loader profiles still hit the database, but the result is reused afterwards
+            place = self.place_repo.get(place_id, profile=profile)
+            identity_map = self._identity_map()
+            if place is not None and identity_map is not None:
+                identity_map[('place', place_id)] = place
+            return place
+        return self._get_cached('place', place_id, lambda: self.place_repo.get(place_id))
 
     def get_all_places(self):
-        return self.place_repo.get_all()
+        return self.place_repo.get_all(profile='summary')
+
+    def find_places(self, limit=None, after=None, **filters):
+        return self.place_repo.find(limit, after, **filters)
+
+    def iter_places(self, batch_size=1000):
+        return self.place_repo.iter_all(batch_size)
+
+    def count_places(self, exact=False, **filters):
+        """Number of places matching the find_places filters"""
+        filters = {key: value for key, value in filters.items() if value not in (None, [], '')}
+        if not filters.get('amenity_ids'):
+            filters.pop('amenity_mode', None)
+        if not filters:
+            return row_counters.get('places', self.place_repo.count, exact)
+        key = ('places',) + tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                                         for name, value in filters.items()))
+        return row_counters.get(key, lambda: self.place_repo.count_matching(**filters), exact)
+
+    def get_places_version(self):
+        return self.place_repo.get_version()
+
+    def search_places_nearby(self, latitude, longitude, radius_km, limit, after=None):
+        return self.place_repo.search_nearby(latitude, longitude, radius_km, limit, after)
+
+    def search_places_in_box(self, min_lat, min_lon, max_lat, max_lon, limit, after=None):
+        return self.place_repo.search_in_box(min_lat, min_lon, max_lat, max_lon, limit, after)
+
+    def search_places_text(self, query, limit, after=None):
+        return self.place_repo.search_text(query, limit, after)
+
+    def suggest_places(self, prefix, limit):
+        return title_index.suggest(prefix, limit, self.place_repo.iter_titles)
 
     def update_place(self, place_id, place_data):
-        self.place_repo.update(place_id, place_data)
+        self._forget('place', place_id)
+        if 'title' in place_data or 'description' in place_data:
+            search_index.track(place_id)
+        place = self.place_repo.update(place_id, place_data)
+        if place is not None and 'title' in place_data:
+            title_index.add(place_id, place.title)
+        row_counters.invalidate_filtered('places')
+        response_cache.invalidate('places', f'place:{place_id}')
+        return place
+
+    def delete_place(self, place_id):
+        self._forget('place', place_id)
+        # One DELETE per table instead of loading the reviews for the ORM cascade,
+        # the search document of a deleted place is dropped by the same commit
+        search_index.track(place_id)
+        deleted = self.place_repo.delete_many([place_id]) > 0
+        if deleted:
+            title_index.remove(place_id)
+            row_counters.adjust('places', -1)
+            # Its reviews went with it
+            row_counters.invalidate('reviews')
+        response_cache.invalidate('places', f'place:{place_id}')
+        return deleted
 
     # REVIEWS
     def create_review(self, review_data):
         user_id = review_data.get('user_id')
         place_id = review_data.get('place_id')
 
-        user = self.user_repo.get(review_data['user_id'])
+        user = self.get_user(review_data['user_id'])
         if not user:
             raise ValueError('User not found')
         
-        place = self.place_repo.get(place_id)
+        place = self.get_place(place_id)
         if not place:
             raise ValueError('Place not found')
 
@@ -101,15 +267,42 @@ class HBnBFacade:
             place=place,
             user=user
         )
+        place.add_rating(review.rating)
+        search_index.track_reviews(review)
 
-        self.review_repo.add(review)
+        # The place aggregates and search row are committed together with the review
+        try:
+            self.review_repo.add(review)
+        except IntegrityError:
+            # Lost a race against the (place_id, user_id) unique index
+            db.session.rollback()
+            raise ValueError('You have already reviewed this place')
+        row_counters.adjust('reviews', 1)
+        response_cache.invalidate('places', f'place:{place.id}')
         return review
         
-    def get_review(self, review_id):
-        return self.review_repo.get(review_id)
+    def get_review(self, review_id, fields=None):
+        return self.review_repo.get(review_id, fields=fields)
+
+    def get_all_reviews(self, fields=None):
+        return self.review_repo.get_all(fields=fields)
+
+    def get_reviews_page(self, limit, after=None, fields=None):
+        return self.review_repo.get_page(limit, after, fields=fields)
+
+    def iter_reviews(self, batch_size=1000):
+        return self.review_repo.iter_all(batch_size)
+
+    def count_reviews(self, exact=False):
+        return row_counters.get('reviews', self.review_repo.count, exact)
+
+    def get_reviews_version(self, place_id=None):
+        if place_id is None:
+            return self.review_repo.get_version()
+        return self.review_repo.get_version(place_id=place_id)
 
-    def get_all_reviews(self):
-        return self.review_repo.get_all()
+    def has_reviewed(self, place_id, user_id):
+        return self.review_repo.exists_for(place_id, user_id)
 
     def get_reviews_by_place(self, place_id):
         place = self.place_repo.get(place_id)
@@ -118,7 +311,33 @@ class HBnBFacade:
         return place.reviews
 
     def update_review(self, review_id, review_data):
-        self.review_repo.update(review_id, review_data)
+        review = self.review_repo.get(review_id)
+        if not review:
+            return None
+        try:
+            if 'rating' in review_data:
+                new_rating = review.validate_rating('rating', review_data['rating'])
+                if new_rating != review.rating:
+                    review.place.remove_rating(review.rating)
+                    review.place.add_rating(new_rating)
+            if 'text' in review_data:
+                search_index.track_reviews(review_id)
+            updated = self.review_repo.update(review_id, review_data)
+        except Exception:
+            db.session.rollback()
+            raise
+        response_cache.invalidate('places', f'place:{review.place_id}')
+        return updated
 
     def delete_review(self, review_id):
-        self.review_repo.delete(review_id)
+        review = self.review_repo.get(review_id)
+        if not review:
+            return False
+        place_id = review.place_id
+        review.place.remove_rating(review.rating)
+        search_index.track_reviews(review_id)
+        deleted = self.review_repo.delete(review_id)
+        if deleted:
+            row_counters.adjust('reviews', -1)
+        response_cache.invalidate('places', f'place:{place_id}')
+        return deleted
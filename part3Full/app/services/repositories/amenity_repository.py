@@ -1,6 +1,32 @@
+from app.extensions import db
 from app.models.amenity import Amenity
 from app.persistence.repository import SQLAlchemyRepository
 
 class AmenityRepository(SQLAlchemyRepository):
+    # The bit is the amenity's position in every Place.amenity_mask
+    protected_fields = SQLAlchemyRepository.protected_fields + ('bit',)
+
     def __init__(self):
         super().__init__(Amenity)
+
+    def add(self, obj):
+        self._assign_bits([obj])
+        return super().add(obj)
+
+    def add_many(self, objs):
+        self._assign_bits(objs)
+        return super().add_many(objs)
+
+    def assign_missing_bits(self):
+        """Give a bit to the amenities stored before amenity_mask existed"""
+        self._assign_bits(Amenity.query.filter(Amenity.bit.is_(None)).order_by(Amenity.created_at).all())
+        db.session.commit()
+
+    def _assign_bits(self, amenities):
+        """Give each new amenity the next free position in Place.amenity_mask"""
+        highest = db.session.query(db.func.max(Amenity.bit)).scalar()
+        next_bit = 0 if highest is None else highest + 1
+        for amenity in amenities:
+            if amenity.bit is None and next_bit < Amenity.MAX_BITS:
+                amenity.bit = next_bit
+                next_bit += 1
@@ -1,6 +1,228 @@
+from sqlalchemy import and_, or_, exists, false
+from sqlalchemy.orm import joinedload, selectinload, lazyload
+from app.extensions import db, search_index
+from app.geo import bounding_box, box_center, covering_cells, split_box, haversine_km, encode_geohash
+from app.models.amenity import Amenity
 from app.models.place import Place
+from app.models.place_amenity import place_amenity
+from app.models.review import Review
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.pagination import encode_cursor, decode_cursor
 
 class PlaceRepository(SQLAlchemyRepository):
+    load_profiles = {
+        # Listings only serialize columns: skip the amenities subquery load
+        'summary': lambda: [lazyload(Place.amenities)],
+        # Detail page: owner joined, amenities and reviews in one SELECT each
+        'detail': lambda: [
+            joinedload(Place.owner),
+            selectinload(Place.amenities),
+            selectinload(Place.reviews),
+        ],
+    }
+
+    # Sort keys and the coordinates the geo search measures distances from
+    always_load = SQLAlchemyRepository.always_load + ('price', 'latitude', 'longitude')
+
+    # geohash is derived from both coordinates of the loaded place
+    orm_update_keys = ('latitude', 'longitude')
+
+    # Rating aggregates only move with the reviews, geohash with the
+    # coordinates and amenity_mask with the amenities
+    protected_fields = SQLAlchemyRepository.protected_fields + (
+        'review_count', 'rating_sum', 'geohash', 'amenity_mask') + tuple(f'rating_{rating}_count' for rating in range(1, 6))
+
+    # Places a geo search may rank in Python; denser areas have to be narrowed down
+    max_geo_candidates = 5000
+
+    # Keysets for the sort orders the place listing accepts
+    sort_orders = {
+        'created_at': (('created_at', False), ('id', False)),
+        'price': (('price', False), ('id', False)),
+        '-price': (('price', True), ('id', True)),
+    }
+
     def __init__(self):
         super().__init__(Place)
+
+    def find(self, limit=None, after=None, sort='created_at', min_price=None, max_price=None,
+             amenity_ids=None, amenity_mode='all', fields=None):
+        """
+        Filter places by price range and amenities in the requested order
+
+        The price bounds become a range scan on the price index and the
+        amenity filter a bitwise test on amenity_mask. Returns
+        (places, next_cursor): one keyset page when limit is given, every
+        match (and no cursor) otherwise.
+        """
+        if sort not in self.sort_orders:
+            raise ValueError(f"sort must be one of: {', '.join(self.sort_orders)}")
+        query = self._filtered(self._query('summary', fields), min_price, max_price,
+                               amenity_ids, amenity_mode)
+        order = self.sort_orders[sort]
+        if limit is None:
+            return self._ordered(query, order).all(), None
+        return self.get_page(limit, after, query=query, order=order)
+
+    def count_matching(self, min_price=None, max_price=None, amenity_ids=None, amenity_mode='all'):
+        """COUNT(*) of the places find() would return for the same filters"""
+        query = db.session.query(db.func.count(Place.id))
+        return self._filtered(query, min_price, max_price, amenity_ids, amenity_mode).scalar()
+
+    def _filtered(self, query, min_price, max_price, amenity_ids, amenity_mode):
+        if min_price is not None:
+            query = query.filter(Place.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Place.price <= max_price)
+        if amenity_ids:
+            query = self._filter_amenities(query, amenity_ids, amenity_mode)
+        return query
+
+    def _filter_amenities(self, query, amenity_ids, mode):
+        if mode not in ('all', 'any'):
+            raise ValueError("amenities_mode must be 'all' or 'any'")
+        amenity_ids = list(dict.fromkeys(amenity_ids))
+        amenities = Amenity.query.filter(Amenity.id.in_(amenity_ids)).all()
+        if mode == 'all' and len(amenities) < len(amenity_ids):
+            return query.filter(false())
+
+        mask = 0
+        clauses = []
+        for amenity in amenities:
+            if amenity.bit is not None:
+                mask |= 1 << amenity.bit
+            else:
+                # Amenities beyond the 63 mask bits fall back to the link table
+                clauses.append(exists().where(place_amenity.c.place_id == Place.id,
+                                              place_amenity.c.amenity_id == amenity.id))
+        if mode == 'all':
+            if mask:
+                clauses.append(Place.amenity_mask.op('&')(mask) == mask)
+            return query.filter(*clauses)
+        if mask:
+            clauses.append(Place.amenity_mask.op('&')(mask) != 0)
+        return query.filter(or_(*clauses) if clauses else false())
+
+    def rebuild_amenity_masks(self):
+        """Recompute amenity_mask of every place from the place_amenity table"""
+        masks = {}
+        rows = db.session.execute(
+            db.select(place_amenity.c.place_id, Amenity.bit)
+            .join(Amenity, Amenity.id == place_amenity.c.amenity_id)
+            .where(Amenity.bit.is_not(None))
+        )
+        for place_id, bit in rows:
+            masks[place_id] = masks.get(place_id, 0) | (1 << bit)
+        db.session.execute(db.update(Place).values(amenity_mask=0))
+        if masks:
+            db.session.execute(db.update(Place), [{'id': place_id, 'amenity_mask': mask}
+                                                  for place_id, mask in masks.items()])
+        db.session.commit()
+
+    def search_nearby(self, latitude, longitude, radius_km, limit, after=None):
+        """Return a page of (distance_km, place) within radius_km, nearest first"""
+        matches = []
+        for place in self._in_box(*bounding_box(latitude, longitude, radius_km)):
+            distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                matches.append((distance, place))
+        return self._distance_page(matches, limit, after)
+
+    def search_in_box(self, min_lat, min_lon, max_lat, max_lon, limit, after=None):
+        """
+        Return a page of (distance_km, place) inside a box, nearest to its centre first
+
+        A box with min_lon greater than max_lon crosses the antimeridian.
+        """
+        center_lat, center_lon = box_center(min_lat, min_lon, max_lat, max_lon)
+        matches = [(haversine_km(center_lat, center_lon, place.latitude, place.longitude), place)
+                   for place in self._in_box(min_lat, min_lon, max_lat, max_lon)]
+        return self._distance_page(matches, limit, after)
+
+    def _in_box(self, min_lat, min_lon, max_lat, max_lon):
+        # One geohash index range scan per covering cell on each side of the
+        # antimeridian; the coordinate filter then trims the cells down to the box
+        prefix_scans, in_box = [], []
+        for box in split_box(min_lat, min_lon, max_lat, max_lon):
+            prefix_scans += [and_(Place.geohash >= cell, Place.geohash < cell + '~')
+                             for cell in covering_cells(*box)]
+            in_box.append(and_(Place.latitude.between(box[0], box[2]),
+                               Place.longitude.between(box[1], box[3])))
+        places = (self._query('summary')
+                  .filter(or_(*prefix_scans))
+                  .filter(or_(*in_box))
+                  .limit(self.max_geo_candidates + 1)
+                  .all())
+        if len(places) > self.max_geo_candidates:
+            raise ValueError("Too many places in the search area, use a smaller radius or box")
+        return places
+
+    def _distance_page(self, matches, limit, after):
+        matches.sort(key=lambda match: (match[0], match[1].id))
+        if after:
+            try:
+                distance, place_id = decode_cursor(after)
+                key = (float(distance), str(place_id))
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+            matches = [m for m in matches if (m[0], m[1].id) > key]
+        page = matches[:limit]
+        next_cursor = None
+        if len(matches) > limit:
+            next_cursor = encode_cursor([page[-1][0], page[-1][1].id])
+        return page, next_cursor
+
+    def search_text(self, query, limit, after=None):
+        """Return a page of (score, place) matching a free-text query, best match first"""
+        offset = 0
+        if after:
+            try:
+                (offset,) = decode_cursor(after)
+                offset = int(offset)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+            if offset < 0:
+                raise ValueError("Invalid cursor")
+        # Relevance is not a stable keyset, so text search pages by offset
+        hits = search_index.search(query, limit + 1, offset)
+        places = {place.id: place for place in self.get_many([place_id for place_id, _ in hits[:limit]],
+                                                               profile='summary')}
+        page = [(score, places[place_id]) for place_id, score in hits[:limit] if place_id in places]
+        next_cursor = encode_cursor([offset + limit]) if len(hits) > limit else None
+        return page, next_cursor
+
+    def iter_titles(self, batch_size=1000):
+        """Yield the (id, title) pair of every place without loading the places"""
+        yield from db.session.query(Place.id, Place.title).yield_per(batch_size)
+
+    def rebuild_geohashes(self):
+        """Fill the geohash column of places stored before it existed"""
+        for place in self.model.query.filter(Place.geohash.is_(None)).all():
+            place.geohash = encode_geohash(place.latitude, place.longitude)
+        db.session.commit()
+
+    def recompute_rating_aggregates(self):
+        """Rebuild the rating columns of every place from the reviews table"""
+        def reviews_of_place(*criteria):
+            return (db.select(db.func.count(Review.id))
+                    .where(Review.place_id == Place.id, *criteria)
+                    .scalar_subquery())
+
+        values = {
+            'review_count': reviews_of_place(),
+            'rating_sum': (db.select(db.func.coalesce(db.func.sum(Review.rating), 0))
+                           .where(Review.place_id == Place.id).scalar_subquery()),
+        }
+        for rating in range(1, 6):
+            values[f'rating_{rating}_count'] = reviews_of_place(Review.rating == rating)
+        db.session.execute(db.update(Place).values(**values))
+        db.session.commit()
+
+    def delete_many(self, obj_ids):
+        """Delete places together with their reviews and amenity links"""
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if not obj_ids:
+            return 0
+        Review.query.filter(Review.place_id.in_(obj_ids)).delete()
+        db.session.execute(place_amenity.delete().where(place_amenity.c.place_id.in_(obj_ids)))
+        return super().delete_many(obj_ids)
@@ -1,3 +1,4 @@
+from app.extensions import db
 from app.models.review import Review
 from app.persistence.repository import SQLAlchemyRepository
 
@@ -6,5 +7,12 @@ class ReviewRepository(SQLAlchemyRepository):
         super().__init__(Review)
     
     def get_by_place(self, place_id):
-        """Get all reviews for a specific place"""
-        return self.model.query.filter_by(place_id=place_id).all()
+        """Get all reviews for a specific place, oldest first"""
+        return (self.model.query.filter_by(place_id=place_id)
+                .order_by(Review.created_at, Review.id).all())
+
+    def exists_for(self, place_id, user_id):
+        """Check whether the user already reviewed the place, with a single index lookup"""
+        return db.session.query(
+            db.exists().where(Review.place_id == place_id, Review.user_id == user_id)
+        ).scalar()
@@ -0,0 +1,44 @@
+import unittest
+import config
+from app import create_app
+from app.extensions import bcrypt, db
+from app.geo import bounding_box, split_box, box_center
+from app.services.facade_instance import facade
+
+class TestConfig(config.Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestAntimeridian(unittest.TestCase):
+    def test_bounding_box_wraps_across_the_antimeridian(self):
+        min_lat, min_lon, max_lat, max_lon = bounding_box(0.0, 179.9, 50)
+        self.assertGreater(min_lon, max_lon)
+        self.assertEqual(split_box(min_lat, min_lon, max_lat, max_lon),
+                         [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)])
+        self.assertAlmostEqual(box_center(-1.0, 179.0, 1.0, -179.0)[1], 180.0)
+
+    def test_search_finds_places_on_both_sides(self):
+        bcrypt._log_rounds = 4
+        app = create_app(TestConfig)
+        with app.test_request_context():
+            db.create_all()
+            owner = facade.create_user({'first_name': 'Geo', 'last_name': 'Owner',
+                                        'email': 'geo.owner@example.com', 'password': 'secret'})
+            east = facade.create_place({'title': 'East', 'price': 10.0, 'latitude': 0.0,
+                                        'longitude': 179.9, 'owner_id': owner.id})
+            west = facade.create_place({'title': 'West', 'price': 10.0, 'latitude': 0.0,
+                                        'longitude': -179.9, 'owner_id': owner.id})
+            facade.create_place({'title': 'Far', 'price': 10.0, 'latitude': 0.0,
+                                 'longitude': 170.0, 'owner_id': owner.id})
+
+            nearby, _ = facade.search_places_nearby(0.0, 179.95, 50, 10)
+            self.assertEqual([place.id for _, place in nearby], [east.id, west.id])
+            nearby, _ = facade.search_places_nearby(0.0, -179.95, 50, 10)
+            self.assertEqual([place.id for _, place in nearby], [west.id, east.id])
+            in_box, _ = facade.search_places_in_box(-1.0, 179.0, 1.0, -179.0, 10)
+            self.assertEqual({place.id for _, place in in_box}, {east.id, west.id})
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
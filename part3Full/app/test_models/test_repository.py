@@ -0,0 +1,40 @@
+import unittest
+import config
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.extensions import bcrypt, db
+from app.services.facade_instance import facade
+
+class TestConfig(config.Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    RESPONSE_CACHE_ENABLED = False
+
+class TestSQLAlchemyRepositoryUpdate(unittest.TestCase):
+    def setUp(self):
+        bcrypt._log_rounds = 4
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        with self.app.test_request_context():
+            db.create_all()
+            admin = facade.create_user({'first_name': 'Ada', 'last_name': 'Admin', 'email': 'ada@example.com',
+                                        'password': 'secret', 'is_admin': True})
+            self.amenity_id = facade.create_amenity({'name': 'Sauna'}).id
+            token = create_access_token(identity=str(admin.id), additional_claims={'is_admin': True})
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def test_put_returns_what_get_reads_back(self):
+        put = self.client.put(f'/api/v1/amenities/{self.amenity_id}', json={'name': 'Hammam'},
+                              headers=self.headers)
+        self.assertEqual(put.status_code, 200)
+        get = self.client.get(f'/api/v1/amenities/{self.amenity_id}')
+        self.assertEqual(put.get_json(), get.get_json())
+        self.assertNotIn('+00:00', put.get_json()['updated_at'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import config
+from app import create_app
+from app.extensions import bcrypt, db
+from app.services.facade_instance import facade
+
+class TestConfig(config.Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SEARCH_BACKEND = 'fts5'
+
+class TestFts5Search(unittest.TestCase):
+    def setUp(self):
+        bcrypt._log_rounds = 4
+        self.app = create_app(TestConfig)
+        self.context = self.app.test_request_context()
+        self.context.push()
+        db.create_all()
+        self.owner = facade.create_user({'first_name': 'Ann', 'last_name': 'Owner',
+                                         'email': 'search.owner@example.com', 'password': 'secret'})
+        self.guest = facade.create_user({'first_name': 'Bob', 'last_name': 'Guest',
+                                         'email': 'search.guest@example.com', 'password': 'secret'})
+        self.place = facade.create_place({'title': 'Harbour loft', 'description': 'Above the docks',
+                                          'price': 10.0, 'latitude': 1.0, 'longitude': 1.0,
+                                          'owner_id': self.owner.id})
+
+    def tearDown(self):
+        db.session.rollback()
+        db.drop_all()
+        self.context.pop()
+
+    def titles(self, query):
+        return [place.title for _, place in facade.search_places_text(query, 10)[0]]
+
+    def rows(self):
+        return db.session.execute(db.text("SELECT doc_key FROM place_search_docs ORDER BY docid")).scalars().all()
+
+    def test_review_writes_only_touch_their_own_row(self):
+        review = facade.create_review({'text': 'Seagulls at dawn', 'rating': 4,
+                                       'user_id': self.guest.id, 'place_id': self.place.id})
+        self.assertEqual(self.rows(), [self.place.id, review.id])
+        # Words may come from the place and from its reviews
+        self.assertEqual(self.titles('harbour seagulls'), ['Harbour loft'])
+
+        facade.update_review(review.id, {'text': 'Foghorns all night'})
+        self.assertEqual(self.titles('seagulls'), [])
+        self.assertEqual(self.titles('foghorns'), ['Harbour loft'])
+
+        facade.delete_review(review.id)
+        self.assertEqual(self.rows(), [self.place.id])
+        self.assertEqual(self.titles('foghorns'), [])
+
+    def test_deleting_a_place_drops_its_review_rows(self):
+        facade.create_review({'text': 'Seagulls at dawn', 'rating': 4,
+                              'user_id': self.guest.id, 'place_id': self.place.id})
+        facade.delete_place(self.place.id)
+        self.assertEqual(self.rows(), [])
+        self.assertEqual(self.titles('harbour'), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
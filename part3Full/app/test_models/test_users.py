@@ -0,0 +1,37 @@
+import unittest
+import config
+from app import create_app
+from app.extensions import bcrypt, db
+
+class TestConfig(config.Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+class TestFirstUserBootstrap(unittest.TestCase):
+    def setUp(self):
+        bcrypt._log_rounds = 4
+        self.app = create_app(TestConfig)
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.drop_all()
+
+    def register(self, email):
+        return self.client.post('/api/v1/users/', json={'first_name': 'First', 'last_name': 'User',
+                                                        'email': email, 'password': 'secret'})
+
+    def test_bootstrap_restarts_after_a_reset(self):
+        self.assertEqual(self.register('first@example.com').status_code, 201)
+        self.assertEqual(self.register('second@example.com').status_code, 403)
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+        self.assertEqual(self.register('again@example.com').status_code, 201)
+        self.assertEqual(self.register('third@example.com').status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
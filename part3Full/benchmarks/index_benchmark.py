@@ -0,0 +1,127 @@
+"""
+Show the query plans and timings of the hot lookups before and after ensure_indexes()
+
+Builds a temporary SQLite database with --rows reviews (plus rows/20
+places, 1000 users and 3 amenity links per place), drops the indexes
+introduced for these lookups, then applies them back with
+app.persistence.indexes.ensure_indexes() as a deployment would.
+
+    python benchmarks/index_benchmark.py [--rows 1000000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+from app import create_app
+from app.extensions import db
+from app.persistence.indexes import ensure_indexes
+
+NEW_INDEXES = ('ix_reviews_user_id', 'ix_reviews_place_id_created_at',
+               'ix_places_owner_id', 'ix_place_amenity_amenity_id')
+USERS = 1000
+AMENITIES = 50
+
+QUERIES = [
+    ('reviews of a place, by date',
+     "SELECT * FROM reviews WHERE place_id = :place ORDER BY created_at"),
+    ('reviews of a user',
+     "SELECT * FROM reviews WHERE user_id = :user"),
+    ('places of an owner',
+     "SELECT * FROM places WHERE owner_id = :user"),
+    ('places offering an amenity',
+     "SELECT place_id FROM place_amenity WHERE amenity_id = :amenity"),
+]
+
+
+def load(rows):
+    places = max(rows // 20, 1)
+    now = datetime(2024, 1, 1)
+    chunk = 50000
+
+    db.session.execute(db.text(
+        "INSERT INTO users (id, first_name, last_name, email, password, is_admin, created_at, updated_at) "
+        "VALUES (:id, 'Bench', 'User', :email, 'x', 0, :now, :now)"),
+        [{'id': f'u{i}', 'email': f'u{i}@bench.io', 'now': now} for i in range(USERS)])
+    db.session.execute(db.text(
+        "INSERT INTO amenities (id, name, created_at, updated_at) VALUES (:id, :name, :now, :now)"),
+        [{'id': f'a{i}', 'name': f'amenity {i}', 'now': now} for i in range(AMENITIES)])
+    for start in range(0, places, chunk):
+        ids = range(start, min(start + chunk, places))
+        db.session.execute(db.text(
+            "INSERT INTO places (id, title, price, latitude, longitude, owner_id, amenity_mask, review_count, "
+            "rating_sum, rating_1_count, rating_2_count, rating_3_count, rating_4_count, rating_5_count, "
+            "created_at, updated_at) VALUES (:id, 'Place', 100, 0, 0, :owner, 0, 0, 0, 0, 0, 0, 0, 0, :now, :now)"),
+            [{'id': f'p{i}', 'owner': f'u{i % USERS}', 'now': now} for i in ids])
+        db.session.execute(db.text(
+            "INSERT INTO place_amenity (place_id, amenity_id) VALUES (:place, :amenity)"),
+            [{'place': f'p{i}', 'amenity': f'a{(i + k) % AMENITIES}'} for i in ids for k in range(3)])
+    # Review i goes to place i % places; users are picked so (place, user) stays unique
+    for start in range(0, rows, chunk):
+        db.session.execute(db.text(
+            "INSERT INTO reviews (id, text, rating, place_id, user_id, created_at, updated_at) "
+            "VALUES (:id, 'Nice', 4, :place, :user, :at, :at)"),
+            [{'id': f'r{i}', 'place': f'p{i % places}', 'user': f'u{((i // places) * 50 + i) % USERS}',
+              'at': now + timedelta(seconds=i)} for i in range(start, min(start + chunk, rows))])
+        db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+    return places
+
+
+def measure(places, repeat=20):
+    params = {'place': f'p{places // 2}', 'user': 'u500', 'amenity': 'a7'}
+    results = []
+    for label, sql in QUERIES:
+        plan = ' / '.join(row[-1] for row in db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql), params))
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.session.execute(db.text(sql), params).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append((label, plan, statistics.median(timings)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1000000, help='number of reviews')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark_config = type('BenchmarkConfig', (config.Config,), {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'indexes.db')}",
+        })
+        app = create_app(benchmark_config)
+        with app.app_context():
+            db.create_all()
+            for name in NEW_INDEXES:
+                db.session.execute(db.text(f'DROP INDEX {name}'))
+            db.session.commit()
+
+            start = time.perf_counter()
+            places = load(args.rows)
+            print(f"Loaded {args.rows} reviews, {places} places in {time.perf_counter() - start:.1f}s\n")
+
+            before = measure(places)
+            start = time.perf_counter()
+            created, failed = ensure_indexes()
+            print(f"ensure_indexes() created {', '.join(created)} in {time.perf_counter() - start:.1f}s"
+                  + (f", failed: {failed}" if failed else '') + '\n')
+            db.session.execute(db.text("ANALYZE"))
+            after = measure(places)
+
+        for (label, plan_before, ms_before), (_, plan_after, ms_after) in zip(before, after):
+            print(f"{label}: {ms_before:.3f} ms -> {ms_after:.3f} ms")
+            print(f"  before: {plan_before}")
+            print(f"  after:  {plan_after}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measure create_app() with and without AUTO_SEED
+
+Seeds a temporary SQLite database once, then builds the application
+repeatedly against it, as every gunicorn worker does when it boots.
+
+    python benchmarks/startup_benchmark.py [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import config
+from app import create_app
+
+
+def make_config(database_uri, auto_seed):
+    return type('BenchmarkConfig', (config.Config,), {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'AUTO_SEED': auto_seed,
+    })
+
+
+def time_startup(config_class, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        create_app(config_class)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = f"sqlite:///{os.path.join(directory, 'startup.db')}"
+        # The first seeded start creates the tables and pays for the bcrypt hash
+        create_app(make_config(database_uri, True))
+
+        for label, auto_seed in (('AUTO_SEED on', True), ('AUTO_SEED off', False)):
+            timings = time_startup(make_config(database_uri, auto_seed), args.runs)
+            print(f"{label:14} median {statistics.median(timings):7.2f} ms  "
+                  f"max {max(timings):7.2f} ms  ({args.runs} runs)")
+
+
+if __name__ == '__main__':
+    main()
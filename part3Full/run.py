@@ -10,6 +10,7 @@ CORS(app,
      resources={r"/api/*": {"origins": "*"}},
      supports_credentials=True,
      allow_headers=["Content-Type", "Authorization"],
+     expose_headers=["X-Next-Cursor", "X-DB-Queries", "X-DB-Time", "X-Cache", "X-Identity-Map-Hits", "X-Cache-Hits", "X-Cache-Misses", "X-Cache-Entries", "X-Total-Count", "ETag", "Last-Modified"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
 if __name__ == '__main__':
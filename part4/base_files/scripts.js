@@ -234,8 +234,9 @@ function updateLoginButton() {
 
 /**
  * Récupérer la liste des lieux depuis l'API
+ * @param {string} maxPrice - Prix maximum (optionnel), filtré côté serveur
  */
-async function fetchPlaces() {
+async function fetchPlaces(maxPrice) {
     try {
         const token = getAuthToken();
         const headers = {
@@ -247,7 +248,8 @@ async function fetchPlaces() {
             headers['Authorization'] = `Bearer ${token}`;
         }
 
-        const response = await fetch(`${API_BASE_URL}/places/`, {
+        const query = maxPrice ? `?max_price=${encodeURIComponent(maxPrice)}` : '';
+        const response = await fetch(`${API_BASE_URL}/places/${query}`, {
             method: 'GET',
             headers: headers
         });
@@ -301,31 +303,9 @@ function initPriceFilter() {
   if (!priceFilter) return;
   
   priceFilter.addEventListener('change', (event) => {
-      const maxPrice = event.target.value;
-      const placeCards = document.querySelectorAll('.place-card');
-      
-      placeCards.forEach(card => {
-          if (!maxPrice) {
-              // "All" sélectionné - afficher tous les lieux
-              card.style.display = 'block';
-              return;
-          }
-          
-          // Récupère le prix depuis la carte
-          const priceElement = card.querySelector('.price');
-          if (priceElement) {
-              // Extrait le nombre du texte "150€ per night"
-              const priceText = priceElement.textContent;
-              const price = parseFloat(priceText.replace(/[^0-9.]/g, ''));
-              
-              // Filtre selon le prix sélectionné
-              if (price <= parseFloat(maxPrice)) {
-                  card.style.display = 'block';
-              } else {
-                  card.style.display = 'none';
-              }
-          }
-      });
+      // Le filtrage est fait par l'API : seuls les lieux affichés sont transférés
+      // ("All" sélectionné = valeur vide = tous les lieux)
+      fetchPlaces(event.target.value);
   });
 }
 